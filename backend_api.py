@@ -1,17 +1,149 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse, Response
+from contextlib import asynccontextmanager, AsyncExitStack
 from pydantic import BaseModel
 from typing import Optional, Union
 import sys
 import os
 import json
+import asyncio
+import importlib.util
+import multiprocessing
+import hashlib
+import time
 
 # Add src directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from main_workflow import main_workflow, MainWorkflowState
+from main_workflow import main_workflow, workflow_builder, MainWorkflowState, response_cache
+from config import app_config
+from exoplanet_pipeline_subgraph import prediction_cache, prediction_batcher, prediction_breaker, predict_row, exoplanet_report, get_exoplanet_model
+from ingest import iter_csv_chunks, iter_parquet_chunks
+from functions import parse_table, result_mission
+from jobs import JobQueue
+from metrics import metrics, render_gauges, WORKER
+from memory import open_checkpointer, SessionRetention
+from batching import SingleFlight
+from encoding import negotiate, encode_payload, COLUMNAR_MEDIA_TYPE, ARROW_MEDIA_TYPE
 
-app = FastAPI(title="NASA Exoplanet Detection API")
+# Readiness is separate from liveness: the process is healthy before warm-up finishes
+readiness = {"ready": False, "warm_up_errors": {}}
+
+# Workflow compiled with the SQLite checkpointer, serves requests that carry a session_id
+session_workflow = None
+# Prunes superseded checkpoints and idle sessions of session_workflow
+session_retention: Optional[SessionRetention] = None
+
+# Batch job queue, opened by lifespan (not at import) so importing the app does no SQLite I/O
+job_queue: Optional[JobQueue] = None
+
+
+async def warm_up():
+    """
+    Open the pooled Groq connections and load the prediction backend
+    so the first requests after a deploy don't pay connection setup.
+
+    Failed parts are retried with exponential backoff until they succeed
+    (e.g. through the Space's cold start); /ready flips once they all have.
+    """
+    async def warm_groq():
+        # Building the models imports langchain_groq, keep that off the event loop
+        await asyncio.to_thread(lambda: [app_config.routing_model, app_config.conversation_model, app_config.reasoning_model])
+        # The request opens TLS connections in the shared pool; a rejected key is a failed warm-up
+        response = await app_config.http_async_client.get(
+            f"{app_config.groq_base_url}/openai/v1/models",
+            headers={"Authorization": f"Bearer {app_config.groq_api_key}"}
+        )
+        response.raise_for_status()
+
+    async def warm_predictor():
+        exoplanet_model = await get_exoplanet_model()
+        await asyncio.to_thread(exoplanet_model.warm_up)
+
+    async def warm_until_done(name: str, warm):
+        delay = 1.0
+        while True:
+            try:
+                await warm()
+                readiness["warm_up_errors"].pop(name, None)
+                return
+            except Exception as e:
+                readiness["warm_up_errors"][name] = str(e)
+                print(f"Warm-up of {name} failed, retrying in {delay:.0f}s: {e}")
+                # Opt-in: serve anyway, the first requests then pay for the cold start
+                if app_config.ready_on_warm_up_failure:
+                    readiness["ready"] = True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, app_config.warm_up_retry_max_seconds)
+
+    await asyncio.gather(warm_until_done("groq", warm_groq), warm_until_done("prediction_backend", warm_predictor))
+    readiness["ready"] = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global session_workflow, session_retention, job_queue
+
+    exit_stack = AsyncExitStack()
+    if app_config.api_workers == 1 and multiprocessing.parent_process() is not None:
+        # uvicorn spawns its workers (and its --reload process), a bare `uvicorn --workers N` leaves API_WORKERS unset
+        print("Running as a spawned worker with API_WORKERS unset: LLM budgets are not split and caches are "
+              "not shared. Unless this is `--reload`, start with `python backend_api.py --workers N` or set WEB_CONCURRENCY=N")
+
+    try:
+        job_queue = await asyncio.to_thread(JobQueue, app_config.jobs_db_path)
+    except Exception as e:
+        print(f"Batch jobs disabled: {e}")
+
+    # The caches' SQLite tiers, likewise opened here rather than at import
+    for cache in (prediction_cache, response_cache):
+        if cache is None:
+            continue
+        try:
+            await asyncio.to_thread(cache.open)
+        except Exception as e:
+            print(f"Persistent tier of {type(cache).__name__} disabled: {e}")
+
+    try:
+        checkpointer = await exit_stack.enter_async_context(open_checkpointer())
+        session_workflow = workflow_builder.compile(checkpointer=checkpointer)
+        session_retention = await asyncio.to_thread(
+            SessionRetention, app_config.memory_db_path, app_config.memory_ttl_seconds
+        )
+    except Exception as e:
+        session_workflow = None
+        print(f"Session memory disabled, requests run without it: {e}")
+
+    if app_config.warm_up_on_startup:
+        # Serve /health right away, /ready reports when warm-up is done
+        warm_up_task = asyncio.create_task(warm_up())
+    else:
+        readiness["ready"] = True
+
+    yield
+
+    if app_config.warm_up_on_startup and not warm_up_task.done():
+        warm_up_task.cancel()
+    # Only close the pools that were actually opened
+    if "http_async_client" in vars(app_config):
+        await app_config.http_async_client.aclose()
+    if "http_client" in vars(app_config):
+        app_config.http_client.close()
+    session_workflow = None
+    if session_retention is not None:
+        session_retention.close()
+        session_retention = None
+    if job_queue is not None:
+        job_queue.close()
+        job_queue = None
+    for cache in (prediction_cache, response_cache):
+        if cache is not None:
+            await asyncio.to_thread(cache.close)
+    await exit_stack.aclose()
+
+
+app = FastAPI(title="NASA Exoplanet Detection API", lifespan=lifespan)
 
 # Configure CORS for React frontend
 app.add_middleware(
@@ -23,9 +155,27 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Request latency and status counts per route"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.observe("http_request_duration_seconds", time.perf_counter() - start, path=path)
+        metrics.increment("http_requests_total", path=path, status=status)
+
+
 class ChatRequest(BaseModel):
     user_input: str
     attached_table: Optional[str] = None
+    # Conversation id; requests sharing it share (token-budgeted) memory
+    session_id: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
@@ -34,41 +184,146 @@ class ChatResponse(BaseModel):
     output_json: Optional[Union[dict, list[dict]]] = None
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def process_chat_message(request: ChatRequest):
+# /chat and /chat/upload return a ready Response in the negotiated encoding, so the
+# schema is documented here instead of being enforced through response_model
+ENCODED_RESPONSES = {
+    200: {
+        "model": ChatResponse,
+        "content": {
+            COLUMNAR_MEDIA_TYPE: {"schema": {"type": "object"}},
+            ARROW_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}
+        }
+    }
+}
+
+
+class JobRequest(BaseModel):
+    attached_table: str
+    user_input: str = "Analyze the uploaded table"
+
+
+# Identical /chat requests in flight at the same time share one workflow run
+chat_flight = SingleFlight()
+
+
+def jobs() -> JobQueue:
+    """The batch job queue, 503 when it could not be opened"""
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Batch jobs are not available")
+    return job_queue
+
+
+def rate_limit_exception(error: Exception) -> Optional[HTTPException]:
+    """HTTP 429 for an LLM call still rate limited after the scheduler's retries, None for other errors"""
+    if getattr(error, "status_code", None) != 429:
+        return None
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    return HTTPException(
+        status_code=429,
+        detail="The language model is over its rate limit, please retry shortly.",
+        headers={"Retry-After": retry_after} if retry_after else None
+    )
+
+
+async def encoded_response(payload: dict, http_request: Request) -> Response:
+    """
+    Serialize a chat payload as negotiated with the client: row-oriented JSON (default),
+    column-oriented JSON or Arrow IPC (Accept), compressed with brotli or gzip (Accept-Encoding)
+    """
+    media_type, content_encoding = negotiate(
+        http_request.headers.get("accept"),
+        http_request.headers.get("accept-encoding")
+    )
+    # Serializing and compressing a large report is CPU work, keep it off the event loop
+    body, content_encoding = await asyncio.to_thread(encode_payload, payload, media_type, content_encoding)
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def request_key(request: ChatRequest) -> str:
+    """Hash identifying identical chat payloads"""
+    payload = json.dumps([request.user_input, request.attached_table, request.session_id])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def workflow_for(request: ChatRequest) -> tuple:
+    """
+    Pick the workflow and run config for a chat request.
+
+    Returns:
+        (workflow, config): the checkpointed workflow keyed by thread id when the
+        request has a session_id and session memory is available, the stateless one otherwise
+    """
+    if request.session_id is None or session_workflow is None:
+        return main_workflow, None
+    return session_workflow, {"configurable": {"thread_id": request.session_id}}
+
+
+async def prune_session(run_config: Optional[dict]):
+    """Drop the superseded checkpoints of a session turn (and sweep idle sessions)"""
+    if run_config is None or session_retention is None:
+        return
+    try:
+        await asyncio.to_thread(session_retention.prune, run_config["configurable"]["thread_id"])
+    except Exception as e:
+        print(f"Session pruning failed: {e}")
+
+
+async def run_turn(workflow, state: MainWorkflowState, run_config: Optional[dict]) -> dict:
+    """
+    Run one chat turn and collect the node updates into the result.
+
+    compact_memory clears the table and report before the turn is checkpointed,
+    so they are taken from the updates of the nodes that produced them.
+    """
+    result = {}
+    async for chunk in workflow.astream(state, config=run_config, stream_mode="updates"):
+        for node, update in chunk.items():
+            if node != "compact_memory" and update:
+                result.update(update)
+    await prune_session(run_config)
+    return result
+
+
+def initial_state(request: ChatRequest) -> MainWorkflowState:
+    """Input state of one turn; per-turn fields are reset so checkpointed values don't leak"""
+    return MainWorkflowState(
+        messages=[],
+        user_input=request.user_input,
+        attached_table=request.attached_table,
+        response="",
+        output_json=None
+    )
+
+
+@app.post("/chat", responses=ENCODED_RESPONSES)
+async def process_chat_message(request: ChatRequest, http_request: Request):
     """
     Process a chat message through the main workflow
     """
+    workflow, run_config = workflow_for(request)
     try:
         # Prepare state for main workflow
-        state = MainWorkflowState(
-            messages=[],
-            user_input=request.user_input,
-            attached_table=request.attached_table,
-            response=""
-        )
+        state = initial_state(request)
 
-        # Run through main workflow
-        result = main_workflow.invoke(state)
+        # Run through main workflow without blocking the event loop,
+        # attaching to an identical request that is already running
+        result = await chat_flight.run(
+            request_key(request),
+            lambda: run_turn(workflow, state, run_config)
+        )
 
         if result.get("response"):
-            # Parse output_json if it's a string
-            output_json = result.get("output_json")
-            if output_json and isinstance(output_json, str):
-                try:
-                    # Remove markdown code block formatting if present
-                    if output_json.startswith("```json"):
-                        output_json = output_json.replace("```json", "").replace("```", "").strip()
-                    output_json = json.loads(output_json)
-                except json.JSONDecodeError:
-                    # If parsing fails, set to None
-                    output_json = None
-
-            return ChatResponse(
-                response=result["response"],
-                is_exoplanet_text=result["routing_decision"],
-                output_json=output_json
-            )
+            # Returned as a ready Response: large reports skip pydantic validation and stdlib json
+            return await encoded_response({
+                "response": result["response"],
+                "is_exoplanet_text": result["routing_decision"],
+                "output_json": result.get("output_json")
+            }, http_request)
         else:
             raise HTTPException(
                 status_code=500,
@@ -76,6 +331,10 @@ async def process_chat_message(request: ChatRequest):
             )
 
     except Exception as e:
+        rate_limited = rate_limit_exception(e)
+        if rate_limited is not None:
+            raise rate_limited
+
         error_msg = f"Error processing request: {str(e)}"
         if "vector" in str(e).lower():
             error_msg += "\n\nPlease ensure your vector data has exactly 122 values between 0.0 and 1.0."
@@ -83,26 +342,269 @@ async def process_chat_message(request: ChatRequest):
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+@app.post("/chat/upload", responses=ENCODED_RESPONSES)
+async def upload_table(
+    http_request: Request,
+    file: UploadFile = File(...),
+    user_input: str = Form("Analyze the uploaded table")
+):
+    """
+    Analyze a CSV or Parquet upload without holding the whole table in memory.
+    Rows are parsed chunk by chunk and scored as soon as each chunk is parsed.
+    """
+    filename = (file.filename or "").lower()
+    is_parquet = filename.endswith(".parquet") or file.content_type == "application/vnd.apache.parquet"
+
+    try:
+        if is_parquet:
+            if importlib.util.find_spec("pyarrow") is None:
+                raise HTTPException(status_code=415, detail="Parquet uploads require pyarrow on the server")
+            chunks = iter_parquet_chunks(file.file, app_config.upload_parquet_batch_rows)
+        else:
+            chunks = iter_csv_chunks(file.read, app_config.upload_chunk_size)
+
+        output_json_list = []
+        parse_errors = []
+        async for rows, errors in chunks:
+            parse_errors.extend(errors)
+            results = await asyncio.gather(*(predict_row(row) for row in rows))
+            for result in results:
+                # The caller already has the input rows, don't keep a second copy of them
+                # (only the mission the vector width identifies is needed for the report)
+                if isinstance(result, dict) and "Input Vector" in result:
+                    mission = result_mission(result)
+                    result = {key: value for key, value in result.items() if key != "Input Vector"}
+                    if mission:
+                        result["Mission"] = mission
+                output_json_list.append(result)
+
+        report = await exoplanet_report.ainvoke({
+            "user_input": user_input,
+            "output_json_list": output_json_list,
+            "parse_errors": parse_errors
+        })
+
+        return await encoded_response({
+            "response": report["transcribed_response"],
+            "is_exoplanet_text": True,
+            "output_json": report["json_final_output"]
+        }, http_request)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise rate_limit_exception(e) or HTTPException(status_code=500, detail=f"Error processing upload: {str(e)}")
+    finally:
+        await file.close()
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """
+    Queue a table for background analysis by the job workers (python src/jobs.py)
+    """
+    rows, parse_errors = await asyncio.to_thread(parse_table, request.attached_table)
+    if not rows:
+        raise HTTPException(status_code=400, detail={"message": "No valid vectors found in table", "parse_errors": parse_errors[:20]})
+
+    job_id = await asyncio.to_thread(jobs().enqueue, request.user_input, rows, parse_errors)
+    return {"job_id": job_id, "status": "queued", "total_rows": len(rows), "rejected_rows": len(parse_errors)}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status and progress (rows scored out of total) of a batch job"""
+    job = await asyncio.to_thread(jobs().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, page: int = 1, page_size: int = 100):
+    """Paged per-row results of a batch job, with the batch report once it is done"""
+    queue = jobs()
+    if await asyncio.to_thread(queue.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await asyncio.to_thread(queue.results, job_id, page, min(max(page_size, 1), 1000))
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Nodes whose LLM tokens are forwarded to the client
+STREAMED_TOKEN_NODES = {"conversation", "json_to_text"}
+
+
+@app.post("/chat/stream")
+async def stream_chat_message(request: ChatRequest):
+    """
+    Process a chat message and stream progress as Server-Sent Events:
+    `routing`, `detection_started`, `prediction`, `token`, `result`, `error`
+    """
+    workflow, run_config = workflow_for(request)
+    state = initial_state(request)
+
+    async def event_stream():
+        try:
+            async for namespace, mode, chunk in workflow.astream(
+                state,
+                config=run_config,
+                stream_mode=["updates", "messages", "custom"],
+                subgraphs=True
+            ):
+                if mode == "messages":
+                    message, metadata = chunk
+                    node = metadata.get("langgraph_node")
+                    if node in STREAMED_TOKEN_NODES and message.content:
+                        yield sse_event("token", {"node": node, "content": message.content})
+
+                elif mode == "custom":
+                    yield sse_event(chunk.get("event", "progress"), chunk)
+
+                elif mode == "updates" and not namespace:
+                    # Only top-level node updates carry the routing decision and final response
+                    if "routing" in chunk:
+                        yield sse_event("routing", {"is_exoplanet_text": chunk["routing"]["routing_decision"]})
+                    for node in ("conversation", "exoplanet_detection"):
+                        if node in chunk:
+                            yield sse_event("result", {
+                                "response": chunk[node].get("response"),
+                                "is_exoplanet_text": node == "exoplanet_detection",
+                                "output_json": chunk[node].get("output_json")
+                            })
+            await prune_session(run_config)
+        except Exception as e:
+            rate_limited = rate_limit_exception(e)
+            if rate_limited is not None:
+                yield sse_event("error", {"status": 429, "detail": rate_limited.detail})
+            else:
+                yield sse_event("error", {"status": 500, "detail": f"Error processing request: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "NASA Exoplanet Detection API is running"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until connections are warm and the prediction backend is loaded (or if warm-up failed)"""
+    status_code = 200 if readiness["ready"] else 503
+    return JSONResponse(status_code=status_code, content=readiness)
+
+
+@app.get("/stats")
+async def stats():
+    """Prediction cache, batching, circuit breaker, response cache, request coalescing, LLM scheduler and routing counters"""
+    return {
+        # Counters are per process, each worker answers for itself
+        "worker": WORKER,
+        "prediction_cache": await asyncio.to_thread(prediction_cache.stats),
+        "prediction_batcher": prediction_batcher.stats(),
+        "prediction_breaker": prediction_breaker.stats(),
+        "response_cache": await asyncio.to_thread(response_cache.stats) if response_cache is not None else None,
+        "chat_coalescing": chat_flight.stats(),
+        "llm_scheduler": app_config.llm_scheduler.stats() if "llm_scheduler" in vars(app_config) else None,
+        "counters": metrics.snapshot()
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-node, LLM, prediction and HTTP metrics in the Prometheus text format"""
+    # Counting the disk tier is a SQLite query
+    cache_stats = await asyncio.to_thread(prediction_cache.stats)
+    batcher_stats = prediction_batcher.stats()
+    flight_stats = chat_flight.stats()
+    optional_gauges = ""
+    if response_cache is not None:
+        response_stats = await asyncio.to_thread(response_cache.stats)
+        optional_gauges = render_gauges("response_cache_lookups", "Response cache lookups by outcome", {
+            (("outcome", "hit"),): response_stats["hits"],
+            (("outcome", "miss"),): response_stats["misses"],
+        })
+    if "llm_scheduler" in vars(app_config):
+        scheduler_stats = app_config.llm_scheduler.stats()
+        optional_gauges += render_gauges("llm_scheduler_slots", "Adaptive LLM concurrency limit, calls in flight and queued", {
+            (("state", "limit"),): scheduler_stats["concurrency_limit"],
+            (("state", "active"),): scheduler_stats["active"],
+            (("state", "queued"),): scheduler_stats["queued"],
+        })
+    return PlainTextResponse(
+        metrics.render_prometheus()
+        + optional_gauges
+        + render_gauges("prediction_cache_lookups", "Prediction cache lookups by outcome", {
+            (("outcome", "memory_hit"),): cache_stats["memory_hits"],
+            (("outcome", "disk_hit"),): cache_stats["disk_hits"],
+            (("outcome", "miss"),): cache_stats["misses"],
+        })
+        + render_gauges("prediction_cache_entries", "Entries held by each prediction cache tier", {
+            (("tier", "memory"),): cache_stats["memory_entries"],
+            (("tier", "disk"),): cache_stats["disk_entries"],
+        })
+        + render_gauges("chat_requests", "/chat requests that ran the workflow or joined an identical one in flight", {
+            (("outcome", "executed"),): flight_stats["executions"],
+            (("outcome", "coalesced"),): flight_stats["coalesced"],
+        })
+        + render_gauges("prediction_batcher_rows", "Rows submitted to and sent by the micro-batcher", {
+            (("stage", "submitted"),): batcher_stats["rows_submitted"],
+            (("stage", "sent"),): batcher_stats["rows_sent"],
+        }),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
     return {
         "message": "NASA Exoplanet Detection API",
         "endpoints": {
-            "chat": "/chat - POST endpoint for processing messages",
+            "chat": "/chat - POST endpoint for processing messages (Accept: application/vnd.exoplanet.columnar+json or application/vnd.apache.arrow.stream for columnar results; gzip/br via Accept-Encoding)",
+            "chat_upload": "/chat/upload - POST multipart CSV/Parquet upload, parsed and scored in chunks",
+            "chat_stream": "/chat/stream - POST endpoint streaming progress as Server-Sent Events",
+            "jobs": "/jobs - POST a table for background analysis, GET /jobs/{id} and /jobs/{id}/results?page= for progress and results",
             "health": "/health - GET health check",
+            "ready": "/ready - GET readiness check (warm connections and prediction backend)",
+            "metrics": "/metrics - GET Prometheus metrics",
+            "stats": "/stats - GET cache, batching and routing counters",
             "docs": "/docs - API documentation"
         }
     }
 
 
 if __name__ == "__main__":
+    # Run as: python backend_api.py [--workers N]
+    import argparse
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    parser = argparse.ArgumentParser(description="Serve the NASA Exoplanet Detection API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS") or os.getenv("WEB_CONCURRENCY") or os.cpu_count() or 1),
+                        help="Worker processes, each with its own interpreter and graphs (default: CPU count). "
+                             "With `uvicorn --workers N` instead, set WEB_CONCURRENCY=N so budgets are split")
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        uvicorn.run(app, host=args.host, port=args.port)
+    else:
+        # Workers import the app themselves and read the worker count to share caches and split LLM budgets
+        os.environ["API_WORKERS"] = str(args.workers)
+        uvicorn.run(
+            "backend_api:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            app_dir=os.path.dirname(os.path.abspath(__file__))
+        )
@@ -0,0 +1,188 @@
+"""
+Local stand-ins for Groq and the Gradio Space, so benchmarks run without network.
+
+- FakeGroqServer: OpenAI-compatible chat completions server (plain and streaming)
+  run in a separate process, selected through GROQ_API_BASE.
+- FakePredictor: in-process prediction backend swapped into app_config.exoplanet_model.
+
+Both take a latency, a jitter and an error rate.
+"""
+import json
+import multiprocessing
+import random
+import socket
+import sys
+import os
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([ROOT, os.path.join(ROOT, "src")])
+
+from predictors import Predictor, DEFAULT_LABELS
+
+
+def _delay(latency_ms: float, jitter_ms: float) -> float:
+    """Seconds to wait for one simulated call"""
+    return max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+
+
+class FakePredictor(Predictor):
+    """
+    Prediction backend returning random class probabilities after a simulated delay.
+    """
+
+    def __init__(self, latency_ms: float = 200, jitter_ms: float = 50, error_rate: float = 0.0,
+                 batching: bool = False):
+        """
+        Args:
+            latency_ms: Mean latency of one call
+            jitter_ms: Uniform jitter added to the latency
+            error_rate: Probability that a call raises
+            batching: Score whole batches in one call, like LocalPredictor
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.supports_batching = batching
+
+    def _result(self, vector) -> dict:
+        probabilities = [random.random() for _ in DEFAULT_LABELS]
+        total = sum(probabilities)
+        probabilities = [p / total for p in probabilities]
+        best = max(range(len(DEFAULT_LABELS)), key=probabilities.__getitem__)
+        return {
+            "Prediction": DEFAULT_LABELS[best],
+            "All Probabilities": dict(zip(DEFAULT_LABELS, probabilities)),
+            "Confidence": probabilities[best],
+            "Success": True
+        }
+
+    def predict(self, input_vector, api_name: str):
+        time.sleep(_delay(self.latency_ms, self.jitter_ms))
+        if random.random() < self.error_rate:
+            raise RuntimeError("Simulated prediction backend failure")
+        return self._result(input_vector)
+
+    def predict_batch(self, vectors: list, api_name: str) -> list:
+        if not self.supports_batching:
+            return super().predict_batch(vectors, api_name)
+
+        time.sleep(_delay(self.latency_ms, self.jitter_ms))
+        return [
+            RuntimeError("Simulated prediction backend failure") if random.random() < self.error_rate
+            else self._result(vector)
+            for vector in vectors
+        ]
+
+
+def build_groq_app(latency_ms: float, jitter_ms: float, error_rate: float, tokens: int):
+    """OpenAI-compatible chat completions app mimicking the Groq API"""
+    import asyncio
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI()
+    words = ("The transit signal shows a periodic dip consistent with a planetary candidate. " * 50).split()
+
+    def reply_text(model: str, tokens_out: int) -> str:
+        # The router only sees ambiguous text, answer like a conversation route
+        if "gpt-oss-20b" in model:
+            return "CONVERSATION"
+        return " ".join(words[:tokens_out])
+
+    @app.get("/openai/v1/models")
+    async def models():
+        return {"object": "list", "data": []}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        prompt_tokens = sum(len(str(message.get("content", ""))) for message in body.get("messages", [])) // 4
+
+        await asyncio.sleep(_delay(latency_ms, jitter_ms))
+        if random.random() < error_rate:
+            return JSONResponse(status_code=503, content={"error": {"message": "Simulated Groq failure"}})
+
+        text = reply_text(model, tokens)
+        completion_tokens = len(text.split())
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage
+            }
+
+        async def stream():
+            for index, word in enumerate(text.split()):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": ("" if index == 0 else " ") + word},
+                                 "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            final = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"usage": usage}
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def _serve_groq(port: int, latency_ms: float, jitter_ms: float, error_rate: float, tokens: int):
+    import uvicorn
+
+    uvicorn.run(build_groq_app(latency_ms, jitter_ms, error_rate, tokens),
+                host="127.0.0.1", port=port, log_level="warning")
+
+
+class FakeGroqServer:
+    """
+    Runs the fake Groq API in a child process so it doesn't share the benchmark's GIL.
+
+    Usage:
+        with FakeGroqServer(latency_ms=300) as server:
+            os.environ["GROQ_API_BASE"] = server.base_url
+    """
+
+    def __init__(self, latency_ms: float = 300, jitter_ms: float = 100, error_rate: float = 0.0, tokens: int = 200):
+        self.settings = (latency_ms, jitter_ms, error_rate, tokens)
+        self.port = None
+        self.process = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+        self.process = multiprocessing.Process(target=_serve_groq, args=(self.port, *self.settings), daemon=True)
+        self.process.start()
+
+        # Wait until the server accepts connections
+        deadline = time.time() + 15
+        while time.time() < deadline:
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.2):
+                    return self
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("Fake Groq server did not start")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
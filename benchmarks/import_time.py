@@ -0,0 +1,64 @@
+"""
+Measure how long `import backend_api` takes in a fresh interpreter.
+
+Model clients are built lazily, so the import must not open any network
+connection. Exits with status 1 when the median import time is over budget.
+
+Usage:
+    python benchmarks/import_time.py [--budget 1.8] [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_import(module: str) -> float:
+    """Wall-clock seconds to import a module in a new interpreter"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def slowest_imports(module: str, top: int) -> list:
+    """Modules with the highest cumulative import time, from -X importtime"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, check=True, capture_output=True, text=True
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)", line)
+        if match:
+            entries.append((int(match.group(1)), match.group(3).strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend_api")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("IMPORT_BUDGET_SECONDS", "1.8")),
+                        help="Maximum median import time in seconds (measured ~1.58 s plus a margin for noise)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    timings = [time_import(args.module) for _ in range(args.runs)]
+    median = statistics.median(timings)
+
+    print(f"import {args.module}: median {median * 1000:.0f} ms over {args.runs} runs "
+          f"(min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms), budget {args.budget * 1000:.0f} ms")
+    print("Slowest imports (cumulative):")
+    for microseconds, name in slowest_imports(args.module, args.top):
+        print(f"  {microseconds / 1000:8.1f} ms  {name}")
+
+    sys.exit(0 if median <= args.budget else 1)
+
+
+if __name__ == "__main__":
+    main()
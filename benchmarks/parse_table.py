@@ -0,0 +1,86 @@
+"""
+Measure how long `parse_table` takes on a large synthetic upload, and check
+that it still skips column headers and reports malformed rows one by one.
+
+Exits with status 1 when a check fails or the median parse time is over budget.
+
+Usage:
+    python benchmarks/parse_table.py [--rows 100000] [--mission kepler] [--budget 1.5] [--runs 3]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([ROOT, os.path.join(ROOT, "src")])
+
+from functions import parse_table
+
+MISSION_SIZES = {"kepler": 122, "k2": 221}
+
+
+def synthetic_table(rows: int, size: int, seed: int = 0) -> str:
+    """CSV table of random feature vectors, built from a pool of distinct rows to keep setup fast"""
+    generator = random.Random(seed)
+    pool = [",".join(f"{generator.random():.6f}" for _ in range(size)) for _ in range(min(rows, 1000))]
+    return "\n".join(pool[index % len(pool)] for index in range(rows))
+
+
+def check_behaviour(size: int) -> list:
+    """Header skipping and per-row error reporting, returns the failed checks"""
+    header = ",".join(f"feature_{index}" for index in range(size))
+    good = ",".join("0.5" for _ in range(size))
+    failures = []
+
+    rows, errors = parse_table(f"{header}\n{good}\n{good}")
+    if len(rows) != 2 or errors:
+        failures.append(f"header row not skipped: {len(rows)} rows, errors {errors}")
+
+    bad_value = good.replace("0.5", "abc", 1)
+    short = ",".join("0.5" for _ in range(size - 1))
+    rows, errors = parse_table(f"{header}\n{good}\n{bad_value}\n{good}\n{short}")
+    if len(rows) != 2 or [error["row"] for error in errors] != [3, 5]:
+        failures.append(f"malformed rows not reported individually: {len(rows)} rows, errors {errors}")
+
+    rows, errors = parse_table(f"# comment\n{good}\n\n{good}")
+    if len(rows) != 2 or errors:
+        failures.append(f"comments or blank lines not skipped: {len(rows)} rows, errors {errors}")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--mission", choices=sorted(MISSION_SIZES), default="kepler")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("PARSE_BUDGET_SECONDS", "1.5")),
+                        help="Maximum median parse time in seconds")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    size = MISSION_SIZES[args.mission]
+    failures = check_behaviour(size)
+    for failure in failures:
+        print(f"FAILED: {failure}")
+
+    table = synthetic_table(args.rows, size)
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        rows, errors = parse_table(table)
+        timings.append(time.perf_counter() - start)
+        if len(rows) != args.rows or errors:
+            failures.append(f"synthetic table parsed into {len(rows)} rows with {len(errors)} errors")
+    median = statistics.median(timings)
+
+    print(f"parse_table: {args.rows} {args.mission} rows ({len(table) / 1e6:.1f} MB), median {median * 1000:.0f} ms "
+          f"over {args.runs} runs (min {min(timings) * 1000:.0f} ms), budget {args.budget * 1000:.0f} ms")
+
+    sys.exit(0 if not failures and median <= args.budget else 1)
+
+
+if __name__ == "__main__":
+    main()
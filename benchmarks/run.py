@@ -0,0 +1,174 @@
+"""
+Offline throughput benchmark for /chat and the exoplanet_pipeline subgraph.
+
+Groq is replaced by a local fake server and the Gradio Space by an
+in-process fake predictor, both with configurable latency, jitter and
+error rate. Synthetic Kepler (122) and K2 (221) tables of several sizes
+are driven at several concurrency levels.
+
+Usage:
+    python benchmarks/run.py --target chat --rows 1,100,1000 --concurrency 1,8,32 --requests 64
+    python benchmarks/run.py --target pipeline --mission k2 --predict-latency-ms 50 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([ROOT, os.path.join(ROOT, "src")])
+
+from fakes import FakeGroqServer, FakePredictor
+
+MISSION_SIZES = {"kepler": 122, "k2": 221}
+
+
+def synthetic_table(rows: int, size: int, seed: int) -> str:
+    """CSV table of random feature vectors in [0, 1]"""
+    generator = random.Random(seed)
+    return "\n".join(
+        ",".join(f"{generator.random():.6f}" for _ in range(size)) for _ in range(rows)
+    )
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(call, tables: list, concurrency: int) -> dict:
+    """Send every table through `call` with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(table: str):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(table)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(table) for table in tables))
+    elapsed = time.perf_counter() - start
+
+    rows = sum(table.count("\n") + 1 for table in tables)
+    return {
+        "requests": len(tables),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(tables) / elapsed, 2),
+        "rows_per_s": round(rows / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0
+    }
+
+
+async def benchmark(args) -> list:
+    # Imported after the environment points at the fake Groq server
+    import httpx
+    from config import app_config
+    import backend_api
+    from exoplanet_pipeline_subgraph import exoplanet_pipeline
+
+    app_config.exoplanet_model = FakePredictor(
+        latency_ms=args.predict_latency_ms,
+        jitter_ms=args.predict_jitter_ms,
+        error_rate=args.predict_error_rate,
+        batching=args.predict_batching
+    )
+
+    transport = httpx.ASGITransport(app=backend_api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def call_chat(table: str):
+            response = await client.post("/chat", json={"user_input": "Analyze this table", "attached_table": table})
+            response.raise_for_status()
+
+        async def call_pipeline(table: str):
+            await exoplanet_pipeline.ainvoke({
+                "user_input": "Analyze this table",
+                "attached_table": table,
+                "vector_list": [],
+                "parse_errors": [],
+                "output_json_list": [],
+                "transcribed_response": None,
+                "json_final_output": None
+            })
+
+        call = call_chat if args.target == "chat" else call_pipeline
+        size = MISSION_SIZES[args.mission]
+        results = []
+        seed = 0
+        for rows in args.rows:
+            for concurrency in args.concurrency:
+                # Distinct tables per request so the prediction cache doesn't hide backend cost
+                tables = []
+                for _ in range(args.requests):
+                    seed += 1
+                    tables.append(synthetic_table(rows, size, 0 if args.repeat_table else seed))
+
+                result = {"target": args.target, "mission": args.mission, "rows": rows, "concurrency": concurrency}
+                result.update(await run_scenario(call, tables, concurrency))
+                results.append(result)
+                print(
+                    f"{args.target:8} {args.mission:6} rows={rows:<6} conc={concurrency:<4} "
+                    f"req/s={result['requests_per_s']:<8} rows/s={result['rows_per_s']:<10} "
+                    f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                    f"errors={result['errors']}"
+                )
+    return results
+
+
+def int_list(value: str) -> list:
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["chat", "pipeline"], default="chat")
+    parser.add_argument("--mission", choices=sorted(MISSION_SIZES), default="kepler")
+    parser.add_argument("--rows", type=int_list, default=[1, 100, 1000], help="Comma-separated table sizes")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32], help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per scenario")
+    parser.add_argument("--repeat-table", action="store_true", help="Send the same table every time (measures caching)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-tokens", type=int, default=200, help="Completion length of the fake LLM")
+    parser.add_argument("--predict-latency-ms", type=float, default=200)
+    parser.add_argument("--predict-jitter-ms", type=float, default=50)
+    parser.add_argument("--predict-error-rate", type=float, default=0.0)
+    parser.add_argument("--predict-batching", action="store_true", help="Fake backend scores whole batches per call")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    with FakeGroqServer(args.llm_latency_ms, args.llm_jitter_ms, args.llm_error_rate, args.llm_tokens) as server:
+        os.environ.update({
+            "GROQ_API_BASE": server.base_url,
+            "GROQ_API_KEY": "benchmark",
+            "WARM_UP_ON_STARTUP": "false",
+            "PREDICTION_CACHE_PATH": ""
+        })
+        results = asyncio.run(benchmark(args))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
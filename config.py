@@ -1,16 +1,20 @@
 import os
+import json
+import threading
 from dataclasses import dataclass
+from functools import cached_property
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from gradio_client import Client
 
 class Config:
     """
     Configuration class to hold API keys and other parameters.
+
+    Model clients are built on first use, so importing the app costs no
+    network round trip and no langchain_groq / gradio_client import.
     """
     def __init__(self):
         """
-        Initializes the configuration by loading environment variables and LLM models.
+        Initializes the configuration by loading environment variables.
         """
         load_dotenv()
         self.groq_api_key: str = os.getenv("GROQ_API_KEY")
@@ -18,41 +22,214 @@ class Config:
         self.hf_token: str = os.getenv("HF_TOKEN")
         self.kepler_api_name = "/predict_kepler"
         self.k2_api_name = "/predict_k2"
-        
-        # Initialize models
-        # Routing - GPT OSS 20b
-        self.routing_model = ChatGroq(
-            model="openai/gpt-oss-20b",
-            api_key=self.groq_api_key
-        )
         self.kepler_vector_size = 122
         self.k2_vector_size = 221
+        # Maximum number of predictions in flight to the model backend
+        self.prediction_concurrency: int = int(os.getenv("PREDICTION_CONCURRENCY", "8"))
+        # Micro-batching of predictions across concurrent requests
+        self.prediction_batch_size: int = int(os.getenv("PREDICTION_BATCH_SIZE", "32"))
+        self.prediction_batch_wait_ms: float = float(os.getenv("PREDICTION_BATCH_WAIT_MS", "5"))
+        # Per-call deadline, hedging after the recent p95 latency and circuit breaker of the prediction backend
+        self.prediction_timeout_seconds: float = float(os.getenv("PREDICTION_TIMEOUT_SECONDS", "30"))
+        self.prediction_hedge_percentile: float = float(os.getenv("PREDICTION_HEDGE_PERCENTILE", "95"))
+        self.prediction_hedge_min_ms: float = float(os.getenv("PREDICTION_HEDGE_MIN_MS", "100"))
+        self.prediction_breaker_failures: int = int(os.getenv("PREDICTION_BREAKER_FAILURES", "5"))
+        self.prediction_breaker_reset_seconds: float = float(os.getenv("PREDICTION_BREAKER_RESET_SECONDS", "30"))
+        # Prediction cache: in-memory LRU bound and optional SQLite file for the persistent tier
+        self.prediction_cache_size: int = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+        self.prediction_cache_path: str | None = os.getenv("PREDICTION_CACHE_PATH") or None
+        # Rows kept in the persistent tier, oldest writes are swept first
+        self.prediction_cache_disk_entries: int = int(os.getenv("PREDICTION_CACHE_DISK_ENTRIES", "1000000"))
+        # Streamed uploads: bytes read per CSV chunk and rows per Parquet record batch
+        self.upload_chunk_size: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1 << 20)))
+        self.upload_parquet_batch_rows: int = int(os.getenv("UPLOAD_PARQUET_BATCH_ROWS", "10000"))
+        # Batch job queue shared by the API and the workers (src/jobs.py)
+        self.jobs_db_path: str = os.getenv("JOBS_DB_PATH", os.path.join(os.path.dirname(__file__), "jobs.db"))
+        self.job_chunk_rows: int = int(os.getenv("JOB_CHUNK_ROWS", "500"))
+        self.job_poll_seconds: float = float(os.getenv("JOB_POLL_SECONDS", "1"))
+        self.job_stale_seconds: float = float(os.getenv("JOB_STALE_SECONDS", "600"))
+        # Times a job waits for the prediction backend to recover before its deferred rows are given up on
+        self.job_max_deferred_rounds: int = int(os.getenv("JOB_MAX_DEFERRED_ROUNDS", "5"))
+        # Shared keep-alive HTTP pool used by every Groq model and the prediction backend
+        self.groq_base_url: str = os.getenv("GROQ_API_BASE", "https://api.groq.com")
+        self.http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+        self.http_max_keepalive_connections: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.http_keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "120"))
+        self.http_timeout: float = float(os.getenv("HTTP_TIMEOUT", "60"))
+        # Batches larger than this are transcribed map-reduce style, in at most transcription_max_chunks chunks
+        self.transcription_chunk_rows: int = int(os.getenv("TRANSCRIPTION_CHUNK_ROWS", "100"))
+        self.transcription_max_chunks: int = int(os.getenv("TRANSCRIPTION_MAX_CHUNKS", "8"))
+        # Chunk notes only see the notable rows (at most transcription_chunk_rows): planets,
+        # candidates, failed analyses and classifications below this confidence
+        self.transcription_low_confidence: float = float(os.getenv("TRANSCRIPTION_LOW_CONFIDENCE", "0.6"))
+        # Opt-in TTL + LRU cache of history-free conversation answers and router decisions
+        self.response_cache_enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+        self.response_cache_size: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+        self.response_cache_ttl_seconds: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+        self.response_cache_path: str | None = os.getenv("RESPONSE_CACHE_PATH") or None
+        # Per-session conversation memory: SQLite checkpoints and the history token budget
+        self.memory_db_path: str = os.getenv("MEMORY_DB_PATH", os.path.join(os.path.dirname(__file__), "memory.db"))
+        self.memory_token_budget: int = int(os.getenv("MEMORY_TOKEN_BUDGET", "2000"))
+        self.memory_summary_chars: int = int(os.getenv("MEMORY_SUMMARY_CHARS", "200"))
+        # Sessions idle for longer than this are deleted from the checkpoint database
+        self.memory_ttl_seconds: float = float(os.getenv("MEMORY_TTL_SECONDS", str(7 * 24 * 3600)))
+        # LLM call scheduler: per-model rate budgets (LLM_RATE_LIMITS='{"model": {"rpm": 30, "tpm": 8000}}'),
+        # adaptive concurrency bound and 429 retries
+        self.llm_rate_limits: dict = json.loads(os.getenv("LLM_RATE_LIMITS", "{}"))
+        self.llm_default_rpm: float = float(os.getenv("LLM_DEFAULT_RPM", "1000"))
+        self.llm_default_tpm: float = float(os.getenv("LLM_DEFAULT_TPM", "250000"))
+        self.llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+        self.llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "4"))
+        self.llm_max_queue_seconds: float = float(os.getenv("LLM_MAX_QUEUE_SECONDS", "30"))
+        # Number of API worker processes; account-wide LLM budgets are split between them.
+        # `python backend_api.py --workers N` sets API_WORKERS; when running `uvicorn --workers N`
+        # directly, set WEB_CONCURRENCY=N instead (uvicorn reads it as its own --workers default)
+        self.api_workers: int = max(1, int(os.getenv("API_WORKERS") or os.getenv("WEB_CONCURRENCY") or "1"))
+        # SQLite file holding the prediction and response caches shared by the workers
+        self.shared_cache_path: str = os.getenv("SHARED_CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache.db"))
+        if self.api_workers > 1:
+            # Caches not given their own file live in the shared one instead of once per process
+            self.prediction_cache_path = self.prediction_cache_path or self.shared_cache_path
+            self.response_cache_path = self.response_cache_path or self.shared_cache_path
+        # Open connections and load the prediction backend when the API starts
+        self.warm_up_on_startup: bool = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"
+        # Failed warm-up steps are retried with exponential backoff up to this interval
+        self.warm_up_retry_max_seconds: float = float(os.getenv("WARM_UP_RETRY_MAX_SECONDS", "60"))
+        # Report ready while warm-up is still failing (the first requests then pay for the cold start)
+        self.ready_on_warm_up_failure: bool = os.getenv("READY_ON_WARM_UP_FAILURE", "false").lower() == "true"
 
         # Exoplanet Detection Model
-        self.exoplanet_model = Client(
-            "chadiawar977/Nasa_space",
-            self.hf_token,
+        # "remote" calls the Gradio Space, "local" scores in-process from LOCAL_MODEL_DIR
+        self.prediction_backend: str = os.getenv("PREDICTION_BACKEND", "remote").lower()
+        self.local_model_dir: str = os.getenv("LOCAL_MODEL_DIR", os.path.join(os.path.dirname(__file__), "models"))
+        self._exoplanet_model = None
+        self._model_lock = threading.Lock()
+
+    # Shared HTTP transports
+    def _http_limits(self):
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.http_max_connections,
+            max_keepalive_connections=self.http_max_keepalive_connections,
+            keepalive_expiry=self.http_keepalive_expiry
         )
 
-        self.text_to_json_model = ChatGroq(
+    @cached_property
+    def http_client(self):
+        import httpx
+
+        return httpx.Client(limits=self._http_limits(), timeout=self.http_timeout)
+
+    @cached_property
+    def http_async_client(self):
+        import httpx
+        from scheduler import ScheduledTransport
+
+        # Chat completions go through the rate-limit aware scheduler
+        transport = ScheduledTransport(httpx.AsyncHTTPTransport(limits=self._http_limits()), self.llm_scheduler)
+        return httpx.AsyncClient(transport=transport, timeout=self.http_timeout)
+
+    @cached_property
+    def llm_scheduler(self):
+        from scheduler import LLMScheduler
+
+        return LLMScheduler(
+            rate_limits=self.llm_rate_limits,
+            default_rpm=self.llm_default_rpm,
+            default_tpm=self.llm_default_tpm,
+            max_concurrency=self.llm_max_concurrency,
+            processes=self.api_workers,
+            max_retries=self.llm_max_retries,
+            max_queue_seconds=self.llm_max_queue_seconds
+        )
+
+    # Lazily initialized models
+    # Routing - GPT OSS 20b
+    @cached_property
+    def routing_model(self):
+        return self._chat_model(model="openai/gpt-oss-20b", priority=0)
+
+    @cached_property
+    def text_to_json_model(self):
+        return self._chat_model(
             model="qwen/qwen3-32b",
+            priority=2,
             temperature=0,
-            api_key=self.groq_api_key,
             response_format={"type": "json_object"},
         )
 
-        # Conversation - Kimi K2 Instruct
-        self.conversation_model = ChatGroq(
-            model="moonshotai/kimi-k2-instruct-0905",
-            temperature=1,
-            api_key=self.groq_api_key
-        )
-       
-        # Reasoning - GPT OSS 120b
-        self.reasoning_model = ChatGroq(
-            model="openai/gpt-oss-120b",
-            temperature=0,
-            api_key=self.groq_api_key
+    # Conversation - Kimi K2 Instruct
+    @cached_property
+    def conversation_model(self):
+        return self._chat_model(model="moonshotai/kimi-k2-instruct-0905", temperature=1, priority=1)
+
+    # Reasoning - GPT OSS 120b
+    @cached_property
+    def reasoning_model(self):
+        return self._chat_model(model="openai/gpt-oss-120b", temperature=0, priority=2)
+
+    # Exoplanet Detection Model
+    @property
+    def exoplanet_model(self):
+        # The remote client handshakes with the Space, make sure concurrent first calls build it once
+        if self._exoplanet_model is None:
+            with self._model_lock:
+                if self._exoplanet_model is None:
+                    self._exoplanet_model = self._build_exoplanet_model()
+        return self._exoplanet_model
+
+    @exoplanet_model.setter
+    def exoplanet_model(self, predictor):
+        self._exoplanet_model = predictor
+
+    @cached_property
+    def llm_metrics(self):
+        from metrics import llm_metrics_callback
+
+        return llm_metrics_callback()
+
+    def _chat_model(self, priority: int, **kwargs):
+        """
+        Builds a Groq chat model with the shared API key, connection pool and metrics callback.
+
+        Args:
+            priority: Scheduler priority of the model's calls (0 = router, 1 = conversation, 2 = reasoning)
+        """
+        from langchain_groq import ChatGroq
+        from scheduler import PRIORITY_HEADER
+
+        return ChatGroq(
+            api_key=self.groq_api_key,
+            base_url=self.groq_base_url,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            callbacks=[self.llm_metrics],
+            # The scheduler owns retries of rate-limited calls
+            max_retries=0,
+            default_headers={PRIORITY_HEADER: str(priority)},
+            **kwargs
         )
 
+    def _build_exoplanet_model(self):
+        """
+        Builds the prediction backend selected by `prediction_backend`.
+        """
+        # Imported here because predictors depends on modules that import app_config
+        from predictors import GradioPredictor, LocalPredictor
+
+        if self.prediction_backend == "local":
+            return LocalPredictor(
+                self.local_model_dir,
+                missions={self.kepler_api_name: "kepler", self.k2_api_name: "k2"}
+            )
+        if self.prediction_backend == "remote":
+            return GradioPredictor(
+                "chadiawar977/Nasa_space",
+                self.hf_token,
+                # Calls abandoned at the prediction deadline don't keep a thread busy any longer
+                httpx_kwargs={"timeout": min(self.http_timeout, self.prediction_timeout_seconds)}
+            )
+        raise ValueError(f"Unknown PREDICTION_BACKEND: {self.prediction_backend!r} (expected 'remote' or 'local')")
+
 app_config = Config()
\ No newline at end of file
@@ -146,8 +146,8 @@ const ResultsVisualization = ({ data }) => {
       // Create vector analysis from classification results
       const vectorAnalysis = classificationResults.map((result, index) => ({
         segment: result.system_index,
-        value: result.confidence * 100,
-        baseline: 50 + (result.probability_distribution.confirmed * 30)
+        value: (result.confidence || 0) * 100,
+        baseline: 50 + (((result.probability_distribution || {}).confirmed || 0) * 30)
       }));
 
       return {
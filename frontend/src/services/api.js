@@ -10,11 +10,15 @@ const api = axios.create({
   },
 });
 
+// One conversation per page load; the backend keeps its memory under this id
+const SESSION_ID = crypto.randomUUID();
+
 export const processMessage = async (userInput, csvData = null) => {
   try {
     const response = await api.post('https://nasa-project-ec51.onrender.com/chat', {
       user_input: userInput,
       attached_table: csvData,
+      session_id: SESSION_ID,
     });
 
     return response.data.response;
@@ -36,6 +40,7 @@ export const processSmartMessage = async (userInput, csvData = null) => {
     const response = await api.post('https://nasa-project-ec51.onrender.com/chat', {
       user_input: userInput,
       attached_table: csvData,
+      session_id: SESSION_ID,
     });
     // Check if the API response indicates this is an exoplanet test
     const isExoplanetTest = response.data.is_exoplanet_text || true;
@@ -59,12 +64,13 @@ export const processSmartMessage = async (userInput, csvData = null) => {
 
 export const uploadAndAnalyzeCsv = async (file) => {
   try {
-const text = await file.text();
-    const fileName = file.name;
+    // Send the file as multipart so the backend can parse it in chunks
+    const formData = new FormData();
+    formData.append('file', file);
+    formData.append('user_input', `Analyze the uploaded file: ${file.name}`);
 
-    const response = await api.post('https://nasa-project-ec51.onrender.com/chat', {
-      user_input: `Analyze the uploaded CSV file: ${fileName}`,
-      attached_table: text,
+    const response = await api.post('https://nasa-project-ec51.onrender.com/chat/upload', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
     });
 
     return response.data.response;
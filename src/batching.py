@@ -0,0 +1,155 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+# Batch callable: (api_name, vectors) -> one result (or exception) per vector, in order
+BatchFunction = Callable[[str, List[Any]], Awaitable[List[Any]]]
+
+
+class PredictionBatcher:
+    """
+    Micro-batching dispatcher for exoplanet model predictions.
+
+    Vectors submitted by all in-flight requests are queued per mission API and
+    flushed as one batched call once `max_batch_size` rows are waiting or
+    `max_wait_ms` has elapsed since the first row arrived. Identical vectors
+    inside a batch are only sent once. Each caller gets back its own result.
+    """
+
+    def __init__(self, predict_batch: BatchFunction, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Args:
+            predict_batch: Coroutine scoring a list of vectors for one mission API
+            max_batch_size: Number of queued rows that triggers an immediate flush
+            max_wait_ms: Longest time a row waits for other rows to join its batch
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._pending: Dict[str, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set = set()
+
+        # Counters
+        self.rows_submitted = 0
+        self.batches_sent = 0
+        self.rows_sent = 0
+
+    async def submit(self, vector, api_name: str):
+        """Queue one vector and wait for its prediction"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._pending.setdefault(api_name, [])
+        batch.append((vector, future))
+        self.rows_submitted += 1
+
+        if len(batch) >= self.max_batch_size:
+            self._flush(api_name)
+        elif api_name not in self._timers:
+            self._timers[api_name] = loop.call_later(self.max_wait_ms / 1000, self._flush, api_name)
+
+        return await future
+
+    def _flush(self, api_name: str):
+        """Send everything queued for a mission API as one batch"""
+        timer = self._timers.pop(api_name, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(api_name, [])
+        if not batch:
+            return
+
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(self._dispatch(api_name, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, api_name: str, batch: List[Tuple[Any, asyncio.Future]]):
+        """Score a batch and hand each caller its result"""
+        # Deduplicate identical vectors coming from different requests
+        unique_vectors = []
+        positions = {}
+        indices = []
+        for vector, _ in batch:
+            key = self._vector_key(vector)
+            if key not in positions:
+                positions[key] = len(unique_vectors)
+                unique_vectors.append(vector)
+            indices.append(positions[key])
+
+        self.batches_sent += 1
+        self.rows_sent += len(unique_vectors)
+
+        try:
+            results = await self.predict_batch(api_name, unique_vectors)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), index in zip(batch, indices):
+            if future.done():
+                continue
+            result = results[index]
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _vector_key(vector):
+        """Hashable identity of a vector"""
+        if isinstance(vector, str):
+            return vector
+        # NumPy arrays hash on their raw bytes
+        return vector.tobytes() if hasattr(vector, "tobytes") else tuple(vector)
+
+    def stats(self) -> dict:
+        """Batching counters"""
+        return {
+            "rows_submitted": self.rows_submitted,
+            "batches_sent": self.batches_sent,
+            "rows_sent": self.rows_sent,
+            "average_batch_size": round(self.rows_sent / self.batches_sent, 2) if self.batches_sent else 0.0
+        }
+
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent calls with the same key share one execution.
+
+    The first caller starts the work as a task; callers arriving while it is
+    in flight await that same task and receive its result (or exception).
+    A caller that is cancelled (e.g. client disconnect) does not cancel the
+    shared task for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+        # Counters
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, work: Callable[[], Awaitable[Any]]):
+        """Await the in-flight execution for `key`, starting `work()` if there is none"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(work())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Coalescing counters"""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls)
+        }
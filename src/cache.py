@@ -0,0 +1,400 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+import numpy as np
+
+# Stripped from the end of cached questions ("what is a transit?" == "what is a transit")
+TRAILING_PUNCTUATION = " .?!,;:"
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with a fixed number of entries.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Args:
+            max_size: Maximum number of entries kept before the least recently used is evicted
+        """
+        self.max_size = max(1, max_size)
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None"""
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any):
+        """Insert or refresh a value, evicting the oldest entry when full"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        """Drop an entry if it is cached"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteStore:
+    """
+    Minimal persistent key/value store backed by a single SQLite table.
+    Values are stored as JSON so they survive restarts.
+
+    Writes are buffered and committed in batches by a background thread, so
+    `set` never waits on disk. Reads block on SQLite: async callers run `get`
+    in a worker thread. The same thread periodically sweeps the table: rows
+    past their expiry time and the oldest writes beyond `max_entries` are deleted.
+    """
+
+    def __init__(self, path: str, table: str = "cache", flush_interval: float = 0.05,
+                 max_entries: Optional[int] = None, expiring: bool = False, sweep_interval: float = 300):
+        """
+        Args:
+            path: SQLite database file
+            table: Table holding the key/value pairs
+            flush_interval: Seconds writes are collected before one batched commit
+            max_entries: Rows kept by the sweep, oldest writes first out (unbounded when None)
+            expiring: Values are [expires_at, value] pairs, swept once expires_at has passed
+            sweep_interval: Seconds between two sweeps
+        """
+        self.path = path
+        self.table = table
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self.expiring = expiring
+        self.sweep_interval = sweep_interval
+        self.swept = 0
+        self._lock = threading.Lock()
+        # key -> JSON value, or None for a pending delete
+        self._pending: dict = {}
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        self._conn = self._connect()
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, name=f"sqlite-{table}-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Several API workers may write the same file, wait for their locks instead of failing
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # A lost cache write after a power cut is harmless, skip the fsync per commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._pending:
+                value = self._pending[key]
+                return json.loads(value) if value is not None else None
+            row = self._conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any):
+        """Queue a write, committed with the next batch"""
+        encoded = json.dumps(value)
+        with self._lock:
+            self._pending[key] = encoded
+        self._wakeup.set()
+
+    def delete(self, key: str):
+        """Queue a delete, committed with the next batch"""
+        with self._lock:
+            self._pending[key] = None
+        self._wakeup.set()
+
+    def flush(self):
+        """Commit every queued write now"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        writes = [(key, value) for key, value in pending.items() if value is not None]
+        deletes = [(key,) for key, value in pending.items() if value is None]
+        with self._writer_conn:
+            self._writer_conn.executemany(f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", writes)
+            self._writer_conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", deletes)
+
+    def sweep(self) -> int:
+        """Delete expired rows and the oldest rows beyond max_entries, returning the number deleted"""
+        deleted = 0
+        with self._writer_conn:
+            if self.expiring:
+                deleted += self._writer_conn.execute(
+                    f"DELETE FROM {self.table} WHERE json_extract(value, '$[0]') <= ?", (time.time(),)
+                ).rowcount
+            if self.max_entries is not None:
+                # INSERT OR REPLACE gives a rewritten key a new rowid, so rowid order is write order
+                deleted += self._writer_conn.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN "
+                    f"(SELECT rowid FROM {self.table} ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                ).rowcount
+        self.swept += deleted
+        return deleted
+
+    def _write_loop(self):
+        self._writer_conn = self._connect()
+        # Other workers sharing the file keep writing, sweep on start-up and then on a timer
+        next_sweep = time.monotonic()
+        while True:
+            if self.expiring or self.max_entries is not None:
+                if time.monotonic() >= next_sweep:
+                    try:
+                        self.sweep()
+                    except sqlite3.Error as e:
+                        print(f"Cache sweep of {self.path} failed: {e}")
+                    next_sweep = time.monotonic() + self.sweep_interval
+                self._wakeup.wait(max(0.0, next_sweep - time.monotonic()))
+                if not self._wakeup.is_set():
+                    continue
+            else:
+                self._wakeup.wait()
+            closing = self._closed
+            if not closing:
+                # Let concurrent writes pile up into one transaction
+                time.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"Cache write to {self.path} failed: {e}")
+            if closing:
+                break
+        self._writer_conn.close()
+
+    def close(self):
+        """Commit the queued writes, stop the writer thread and close the connections"""
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class PredictionCache:
+    """
+    Content-addressed cache for exoplanet model predictions.
+
+    Entries are keyed on the mission API name and the float64 bytes of the
+    feature vector, so the same row re-uploaded with different spacing or
+    number formatting hits the same entry. Lookups go to the in-memory LRU
+    tier first and fall back to the optional SQLite tier.
+    """
+
+    def __init__(self, max_size: int = 10000, db_path: Optional[str] = None, max_disk_entries: Optional[int] = None):
+        """
+        Args:
+            max_size: Size bound of the in-memory LRU tier
+            db_path: Optional SQLite file for the persistent tier (disabled when None), opened by open()
+            max_disk_entries: Size bound of the persistent tier, enforced by periodic sweeps (unbounded when None)
+        """
+        self.memory = LRUCache(max_size)
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        # Opened by open(), so that importing the app does no SQLite I/O
+        self.disk: Optional[SQLiteStore] = None
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def open(self):
+        """Open the persistent tier, if configured (blocking: run it in a worker thread from async code)"""
+        if self.db_path and self.disk is None:
+            self.disk = SQLiteStore(self.db_path, table="predictions", max_entries=self.max_disk_entries)
+
+    def close(self):
+        """Commit pending writes and close the persistent tier"""
+        disk, self.disk = self.disk, None
+        if disk is not None:
+            disk.close()
+
+    @staticmethod
+    def key(vector, api_name: str) -> str:
+        """Hash of the mission API name and the canonical float64 vector"""
+        canonical = np.ascontiguousarray(vector, dtype=np.float64)
+        return hashlib.sha256(api_name.encode() + b"|" + canonical.tobytes()).hexdigest()
+
+    async def get(self, vector, api_name: str) -> Optional[Any]:
+        """Return a cached prediction or None"""
+        key = self.key(vector, api_name)
+
+        result = self.memory.get(key)
+        if result is not None:
+            self.memory_hits += 1
+            return result
+
+        if self.disk is not None:
+            # SQLite reads block, keep them off the event loop
+            result = await asyncio.to_thread(self.disk.get, key)
+            if result is not None:
+                self.disk_hits += 1
+                self.memory.set(key, result)
+                return result
+
+        self.misses += 1
+        return None
+
+    def set(self, vector, api_name: str, result: Any):
+        """Store a successful prediction in every tier (the disk write is batched in the background)"""
+        if not self.is_cacheable(result):
+            return
+
+        key = self.key(vector, api_name)
+        self.memory.set(key, result)
+        if self.disk is not None:
+            self.disk.set(key, result)
+
+    @staticmethod
+    def is_cacheable(result: Any) -> bool:
+        """Only successful predictions are worth caching"""
+        if result is None:
+            return False
+        if isinstance(result, dict):
+            return "error" not in result and result.get("Success", True) is not False
+        return True
+
+    def stats(self) -> dict:
+        """Hit/miss counters and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk) if self.disk is not None else None,
+            "disk_swept": self.disk.swept if self.disk is not None else None
+        }
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache for LLM outputs that only depend on the question,
+    e.g. history-free conversation answers and router decisions.
+
+    Keys are the normalized question text, so casing, spacing and trailing
+    punctuation differences ("What is a transit?" / "what is a transit") share
+    an entry. Punctuation inside the text is kept: "2+2" and "2-2" differ.
+    Lookups go to the in-memory LRU tier first and fall back to the optional
+    SQLite tier, which API worker processes share.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: float = 3600, db_path: Optional[str] = None):
+        """
+        Args:
+            max_size: Maximum number of entries kept before the least recently used is evicted
+            ttl_seconds: Age after which an entry is treated as missing
+            db_path: Optional SQLite file for the shared tier (disabled when None), opened by open()
+        """
+        self.memory = LRUCache(max_size)
+        self.db_path = db_path
+        # Opened by open(), so that importing the app does no SQLite I/O
+        self.disk: Optional[SQLiteStore] = None
+        self.ttl_seconds = ttl_seconds
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def open(self):
+        """Open the shared tier, if configured (blocking: run it in a worker thread from async code)"""
+        if self.db_path and self.disk is None:
+            # Expired answers are swept from the shared file even when nobody asks for them again
+            self.disk = SQLiteStore(self.db_path, table="responses", expiring=True)
+
+    def close(self):
+        """Commit pending writes and close the shared tier"""
+        disk, self.disk = self.disk, None
+        if disk is not None:
+            disk.close()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, collapse whitespace and trim trailing punctuation"""
+        return " ".join(text.lower().split()).rstrip(TRAILING_PUNCTUATION)
+
+    @classmethod
+    def key(cls, namespace: str, text: str) -> str:
+        """Hash of the namespace (e.g. "router") and the normalized text"""
+        return hashlib.sha256(f"{namespace}|{cls.normalize(text)}".encode()).hexdigest()
+
+    async def get(self, namespace: str, text: str) -> Optional[Any]:
+        """Return a fresh cached value or None"""
+        key = self.key(namespace, text)
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            # SQLite reads block, keep them off the event loop
+            entry = await asyncio.to_thread(self.disk.get, key)
+            if entry is not None:
+                self.memory.set(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        # Wall-clock expiry so every process agrees on it
+        expires_at, value = entry
+        if time.time() >= expires_at:
+            self.expired += 1
+            self.misses += 1
+            self.memory.delete(key)
+            if self.disk is not None:
+                self.disk.delete(key)
+            return None
+
+        self.hits += 1
+        return value
+
+    def set(self, namespace: str, text: str, value: Any):
+        """Store a value that expires after ttl_seconds"""
+        if value is None or not self.normalize(text):
+            return
+        key = self.key(namespace, text)
+        entry = [time.time() + self.ttl_seconds, value]
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            self.disk.set(key, entry)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk) if self.disk is not None else None,
+            "disk_swept": self.disk.swept if self.disk is not None else None
+        }
@@ -0,0 +1,165 @@
+import gzip
+import json
+import importlib.util
+from typing import Optional, Tuple
+
+# Media types accepted by /chat and /chat/upload (row-oriented JSON is the default)
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.exoplanet.columnar+json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Smaller bodies are not worth the compression CPU
+MIN_COMPRESS_BYTES = 1024
+
+HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+HAS_BROTLI = importlib.util.find_spec("brotli") is not None
+
+
+def dumps(payload) -> bytes:
+    """Serialize to JSON bytes with orjson when installed (NumPy values included)"""
+    if HAS_ORJSON:
+        import orjson
+
+        return orjson.dumps(payload, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=str, separators=(",", ":")).encode()
+
+
+def result_columns(rows: list) -> dict:
+    """
+    Column-oriented form of the per-row classification results.
+
+    The nested probability distribution becomes one `probability_<class>`
+    column per class, so every column is a flat list of scalars.
+    """
+    labels = sorted({label for row in rows for label in (row.get("probability_distribution") or {})})
+    names = [name for name in dict.fromkeys(key for row in rows for key in row) if name != "probability_distribution"]
+
+    columns = {name: [row.get(name) for row in rows] for name in names}
+    for label in labels:
+        columns[f"probability_{label}"] = [(row.get("probability_distribution") or {}).get(label) for row in rows]
+    return columns
+
+
+def columnar_payload(payload: dict) -> dict:
+    """Response payload with `output_json.classification_results` encoded column-wise"""
+    output_json = payload.get("output_json")
+    if not isinstance(output_json, dict) or "classification_results" not in output_json:
+        return payload
+
+    rows = output_json["classification_results"]
+    return {
+        **payload,
+        "output_json": {
+            **output_json,
+            "classification_results": {"row_count": len(rows), "columns": result_columns(rows)}
+        }
+    }
+
+
+def arrow_stream(payload: dict) -> bytes:
+    """
+    Arrow IPC stream of the per-row classification results. The rest of the
+    response (text, summary metrics, ...) travels as JSON in the schema metadata.
+    """
+    import pyarrow as pa
+
+    output_json = payload.get("output_json")
+    rows = output_json.get("classification_results", []) if isinstance(output_json, dict) else []
+    metadata = {**payload, "output_json": {k: v for k, v in (output_json or {}).items() if k != "classification_results"}}
+
+    table = pa.table(result_columns(rows)).replace_schema_metadata({"response": dumps(metadata)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def parse_quality_list(header: Optional[str]) -> dict:
+    """
+    Parse an Accept-style header into {value: q} (RFC 9110, section 12.4.2).
+
+    Values are lowercased and their other parameters dropped; a missing or
+    malformed q counts as 1, and a repeated value keeps its highest q.
+    """
+    qualities = {}
+    for item in (header or "").lower().split(","):
+        value, *params = [part.strip() for part in item.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = min(1.0, max(0.0, float(number)))
+                except ValueError:
+                    pass
+        qualities[value] = max(q, qualities.get(value, 0.0))
+    return qualities
+
+
+def negotiate(accept: Optional[str], accept_encoding: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Pick the media type and content encoding for a response.
+
+    The client's q-values rank the candidates, ties go to the most compact
+    option, and anything with q=0 is never chosen. Row-oriented JSON stays
+    the fallback so existing clients keep working.
+
+    Returns:
+        (media_type, content_encoding) where content_encoding is "br", "gzip" or None
+    """
+    accepted = parse_quality_list(accept)
+
+    def media_quality(media_type: str) -> float:
+        # Most specific match wins: exact type, then type/*, then */*
+        for candidate in (media_type, media_type.split("/")[0] + "/*", "*/*"):
+            if candidate in accepted:
+                return accepted[candidate]
+        return 0.0
+
+    # Wildcards alone don't opt into the custom encodings, clients must name them
+    offers = [(JSON_MEDIA_TYPE, media_quality(JSON_MEDIA_TYPE) if accepted else 1.0)]
+    offers.append((COLUMNAR_MEDIA_TYPE, accepted.get(COLUMNAR_MEDIA_TYPE, 0.0)))
+    if importlib.util.find_spec("pyarrow") is not None:
+        offers.append((ARROW_MEDIA_TYPE, accepted.get(ARROW_MEDIA_TYPE, 0.0)))
+    media_type, quality = max(reversed(offers), key=lambda offer: offer[1])
+    if quality <= 0:
+        media_type = JSON_MEDIA_TYPE
+
+    codings = parse_quality_list(accept_encoding)
+
+    def coding_quality(coding: str) -> float:
+        return codings.get(coding, codings.get("*", 0.0))
+
+    candidates = [("br", coding_quality("br"))] if HAS_BROTLI else []
+    candidates.append(("gzip", coding_quality("gzip")))
+    content_encoding, quality = max(candidates, key=lambda candidate: candidate[1])
+    # Uncompressed is always acceptable here and is used when preferred to every coding
+    if quality <= 0 or codings.get("identity", 0.0) > quality:
+        return media_type, None
+    return media_type, content_encoding
+
+
+def encode_payload(payload: dict, media_type: str, content_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Serialize and compress a response payload.
+
+    Returns:
+        (body, content_encoding actually applied)
+    """
+    if media_type == ARROW_MEDIA_TYPE:
+        body = arrow_stream(payload)
+    elif media_type == COLUMNAR_MEDIA_TYPE:
+        body = dumps(columnar_payload(payload))
+    else:
+        body = dumps(payload)
+
+    if content_encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if content_encoding == "br":
+        import brotli
+
+        # Low quality levels compress JSON well at a fraction of the CPU of the maximum
+        return brotli.compress(body, quality=4), "br"
+    return gzip.compress(body, compresslevel=5), "gzip"
@@ -1,107 +1,376 @@
+import time
+import json
+import math
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 from typing import TypedDict
 from config import app_config
 from langgraph.graph import StateGraph, START, END
-from functions import clean, choose_model_api
+from langgraph.config import get_stream_writer
+from langgraph.constants import TAG_NOSTREAM
+import numpy as np
+from functions import parse_vector, parse_table, choose_model_api, aggregate_results
+from batching import PredictionBatcher
+from cache import PredictionCache
+from metrics import metrics, timed_node
+from resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, hedged, is_backend_failure
 from prompts import *
-from langchain_core.prompts import ChatPromptTemplate
-
-# Initializing models
-vector_parser = app_config.reasoning_model
-exoplanet_model = app_config.exoplanet_model
-json_transcriber_agent = app_config.reasoning_model
-json_output_model = app_config.reasoning_model
-json_output_prompt = ChatPromptTemplate.from_messages([
-    ("system", JSON_OUTPUT_PROMPT),
-    ("user", "{transcribed_response}")
-])
+
+async def get_exoplanet_model():
+    """Resolve the prediction backend off the event loop, the first call may handshake with the Space"""
+    return await asyncio.to_thread(getattr, app_config, "exoplanet_model")
+
+# Dedicated threads for blocking prediction calls. Calls abandoned at the deadline (or
+# losing a hedge) run to completion here instead of piling up in the default executor;
+# the extra threads leave room for them without starving new calls.
+prediction_executor = ThreadPoolExecutor(
+    max_workers=2 * app_config.prediction_concurrency,
+    thread_name_prefix="prediction"
+)
+
+async def predict_vector(vector: np.ndarray, api_name: str):
+    """Run a blocking prediction in a worker thread so the event loop stays free"""
+    exoplanet_model = await get_exoplanet_model()
+    start = time.perf_counter()
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            prediction_executor,
+            functools.partial(exoplanet_model.predict, input_vector=vector, api_name=api_name)
+        )
+        prediction_latency.record(time.perf_counter() - start)
+        return result
+    finally:
+        metrics.observe("prediction_call_duration_seconds", time.perf_counter() - start,
+                        mission_api=api_name, backend=app_config.prediction_backend, batched=False)
+
+# Bounds the number of calls in flight to the model backend
+prediction_slots = asyncio.Semaphore(app_config.prediction_concurrency)
+
+# Stops calling a failing backend; rows are deferred while it is open
+prediction_breaker = CircuitBreaker(
+    failure_threshold=app_config.prediction_breaker_failures,
+    reset_seconds=app_config.prediction_breaker_reset_seconds
+)
+
+# Recent single-call latencies, the hedging delay follows their p95
+prediction_latency = LatencyTracker()
+
+async def guarded_call(call):
+    """Run a backend call through the circuit breaker and under the prediction deadline"""
+    trial = prediction_breaker.state == "half_open"
+    if not prediction_breaker.allow():
+        raise CircuitOpenError("Prediction backend unavailable (circuit open)")
+    try:
+        result = await call()
+    except Exception as e:
+        # Only an unhealthy backend counts towards opening the breaker, a bad row means it answered
+        if is_backend_failure(e):
+            prediction_breaker.record_failure()
+        else:
+            prediction_breaker.record_success()
+        raise
+    except BaseException:
+        # Cancelled (hedge loser, client disconnect): no outcome, but the trial slot must not stay taken
+        if trial:
+            prediction_breaker.release_trial()
+        raise
+    prediction_breaker.record_success()
+    return result
+
+async def predict_batch(api_name: str, vectors: list) -> list:
+    """Score a batch of vectors for one mission API, one result or exception per vector"""
+    # Backends that score whole batches in-process get a single call
+    exoplanet_model = await get_exoplanet_model()
+    if exoplanet_model.supports_batching:
+        async def score_batch():
+            start = time.perf_counter()
+            try:
+                return await asyncio.wait_for(
+                    asyncio.get_running_loop().run_in_executor(
+                        prediction_executor, exoplanet_model.predict_batch, vectors, api_name
+                    ),
+                    app_config.prediction_timeout_seconds
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"No response within {app_config.prediction_timeout_seconds:.1f}s")
+            finally:
+                metrics.observe("prediction_call_duration_seconds", time.perf_counter() - start,
+                                mission_api=api_name, backend=app_config.prediction_backend, batched=True)
+
+        async with prediction_slots:
+            return await guarded_call(score_batch)
+
+    async def predict_one(vector):
+        # A slow call gets one duplicate after the recent p95 latency, if a slot is free for it
+        p95 = prediction_latency.percentile(app_config.prediction_hedge_percentile)
+        hedge_after = max(p95, app_config.prediction_hedge_min_ms / 1000) if p95 is not None else None
+
+        async def hedge():
+            # The duplicate holds a slot of its own, so hedging never exceeds prediction_concurrency
+            async with prediction_slots:
+                return await predict_vector(vector, api_name)
+
+        async def score():
+            return await hedged(
+                lambda: predict_vector(vector, api_name),
+                timeout=app_config.prediction_timeout_seconds,
+                hedge_after=hedge_after,
+                can_hedge=lambda: not prediction_slots.locked(),
+                hedge_call=hedge
+            )
+
+        async with prediction_slots:
+            return await guarded_call(score)
+
+    return await asyncio.gather(*(predict_one(vector) for vector in vectors), return_exceptions=True)
+
+# Coalesces rows from all in-flight requests into per-mission batches
+prediction_batcher = PredictionBatcher(
+    predict_batch,
+    max_batch_size=app_config.prediction_batch_size,
+    max_wait_ms=app_config.prediction_batch_wait_ms
+)
+
+# Skips remote calls for rows that were already scored
+prediction_cache = PredictionCache(
+    max_size=app_config.prediction_cache_size,
+    db_path=app_config.prediction_cache_path,
+    max_disk_entries=app_config.prediction_cache_disk_entries
+)
+
+async def predict_row(vector: np.ndarray):
+    """Score one vector through the cache and batcher, returning an error dict on failure"""
+    model_api = "unknown"
+    try:
+        model_api = choose_model_api(vector)
+
+        # Check if model selection returned an error
+        if isinstance(model_api, dict) and "error" in model_api:
+            metrics.increment("prediction_errors_total", mission_api="none", reason="unsupported_size")
+            return model_api
+
+        cached = await prediction_cache.get(vector, model_api)
+        if cached is not None:
+            return cached
+
+        # Don't queue behind a backend that is known to be down
+        if prediction_breaker.state == "open":
+            raise CircuitOpenError("Prediction backend unavailable (circuit open)")
+
+        result = await prediction_batcher.submit(vector, model_api)
+        prediction_cache.set(vector, model_api, result)
+        return result
+    except CircuitOpenError as e:
+        metrics.increment("prediction_errors_total", mission_api=model_api, reason="deferred")
+        return {
+            "error": f"Prediction deferred: {str(e)}",
+            "success": False,
+            "deferred": True
+        }
+    except Exception as e:
+        # A failing row must not abort the rest of the batch
+        metrics.increment("prediction_errors_total", mission_api=model_api, reason=type(e).__name__)
+        return {
+            "error": f"Prediction failed: {str(e)}",
+            "success": False
+        }
 
 # Pipeline State
 class State(TypedDict):
     user_input: str # Raw user input
     attached_table: str | None # Optional uploaded table containing vectors
-    vector_list: list[str] # list of 121-vectors as strings
+    vector_list: list[np.ndarray] # feature vectors as float64 arrays (122 Kepler / 221 K2 values)
+    parse_errors: list[dict] # rows of attached_table that could not be parsed
     output_json_list: list[dict] # list of JSON outputs for each input vector
     transcribed_response: str # Final human-readable response
-    json_final_output: dict # Final raw JSON output as string
+    json_final_output: dict # Structured batch report aggregated from output_json_list
 
-# Vector Parsing node
-def parse_vectors_node(state: State) -> State:
-    """Parse CSV string into list of vector strings"""   
+def parse_vectors(user_input: str, attached_table: str | None) -> dict:
+    """Parse the attached table and user input into numeric vectors and rejected rows"""
     vector_list = []
-    
-    # 1. Parse CSV if it exists
-    attached_table = state.get("attached_table", "")
+    parse_errors = []
+    mission_sizes = (app_config.kepler_vector_size, app_config.k2_vector_size)
+
+    # 1. Parse the table in bulk if it exists
     if attached_table:
-        # Split by newline and filter out empty lines
-        lines = [line.strip() for line in attached_table.split('\n') if line.strip()]
-        print(f"Number of vectors found in table: {len(lines)}")
-        
-        for line in lines:
-            # Each line should be a comma-separated string of numbers
-            if line:  # Skip empty lines
-                vector_list.append(clean(line))
+        rows, parse_errors = parse_table(attached_table, mission_sizes)
+        print(f"Number of vectors found in table: {len(rows)} ({len(parse_errors)} rejected)")
+        vector_list.extend(rows)
 
     # 2. Parse vector from user input
-    user_input = state.get("user_input", "")
     print(f"User Input: {user_input}")
     if user_input:
-        parsed_vector = clean(user_input)
-        if parsed_vector:
-            vector_list.append(parsed_vector)
-            
+        parsed_vector, error = parse_vector(user_input)
+        if parsed_vector and len(parsed_vector) in mission_sizes:
+            vector_list.append(np.asarray(parsed_vector, dtype=np.float64))
+        elif parsed_vector and not attached_table:
+            # Numbers in a message that accompanies a table (e.g. a file name) are not a vector
+            parse_errors.append({
+                "row": "user_input",
+                "error": f"Unsupported vector size: {len(parsed_vector)}. Expected {app_config.kepler_vector_size} or {app_config.k2_vector_size}"
+            })
+
     return {
-        "vector_list": vector_list
+        "vector_list": vector_list,
+        "parse_errors": parse_errors
     }
 
+# Vector Parsing node
+@timed_node
+async def parse_vectors_node(state: State) -> State:
+    """Parse the attached table and user input into numeric vectors"""
+    # Parsing is CPU-bound, keep it off the event loop
+    return await asyncio.to_thread(parse_vectors, state.get("user_input", ""), state.get("attached_table", ""))
+
 # Exoplanet Detection node
-def exoplanet_detection_node(state: State) -> State:
+@timed_node
+async def exoplanet_detection_node(state: State) -> State:
     """Handle exoplanet detection for each vector"""
 
     vector_list = state["vector_list"]
-    output_json_list = []
 
-    for vector_str in vector_list:
-        model_api = choose_model_api(vector_str)
+    # Emits per-row progress when the graph runs with stream_mode="custom"
+    write_event = get_stream_writer()
+    write_event({"event": "detection_started", "total": len(vector_list)})
+    metrics.observe("pipeline_rows_per_request", len(vector_list))
 
-        # Check if model selection returned an error
-        if isinstance(model_api, dict) and "error" in model_api:
-            output_json_list.append(model_api)
-            continue
+    async def detect(index: int, vector: np.ndarray):
+        result = await predict_row(vector)
+        write_event({"event": "prediction", "index": index, "result": result})
+        return result
 
-        result = exoplanet_model.predict(
-            input_vector=vector_str,
-            api_name=model_api
-        )
-        output_json_list.append(result)
-    
+    # gather keeps results in input order
+    output_json_list = await asyncio.gather(*(detect(index, vector) for index, vector in enumerate(vector_list)))
+
+    return {
+        "output_json_list": list(output_json_list)
+    }
+
+def notable_systems(classification_results: list, limit: int) -> list:
+    """
+    Rows of a chunk worth an analyst note, most interesting first.
+
+    Confirmed planets and candidates come first, then low-confidence
+    classifications (least confident first) and failed analyses. Confident
+    false positives are left out, the slice statistics already count them.
+    """
+    def rank(row: dict) -> tuple:
+        if not row["success"]:
+            return (2, 0.0)
+        if row["classification"] in ("CONFIRMED", "CANDIDATE"):
+            return (0, -(row["confidence"] or 0.0))
+        return (1, row["confidence"] or 0.0)
+
+    notable = [
+        row for row in classification_results
+        if not row["success"] or row["classification"] != "FALSE POSITIVE"
+        or (row["confidence"] or 0.0) < app_config.transcription_low_confidence
+    ]
+    return sorted(notable, key=rank)[:limit]
+
+def batch_statistics(report: dict) -> dict:
+    """The exact batch figures the report narrative must quote"""
     return {
-        "output_json_list": output_json_list
+        "batch_metadata": report["batch_metadata"],
+        "summary_metrics": report["summary_metrics"],
+        "discovery_statistics": report["discovery_statistics"],
+        "follow_up_required": report["recommendations"]["follow_up_required"],
+        "candidates_for_follow_up": len(report["recommendations"]["candidates_for_follow_up"])
     }
 
+def slice_metrics(rows: list) -> dict:
+    """Counts and confidence statistics of a slice of classification results"""
+    confidences = [row["confidence"] for row in rows if row["success"] and row["confidence"] is not None]
+    classifications = [row["classification"] for row in rows if row["success"]]
+    return {
+        "systems": len(rows),
+        "confirmed_exoplanets": classifications.count("CONFIRMED"),
+        "planetary_candidates": classifications.count("CANDIDATE"),
+        "false_positives": classifications.count("FALSE POSITIVE"),
+        "failed_analyses": len(rows) - len(classifications),
+        "average_classification_confidence": round(sum(confidences) / len(confidences), 4) if confidences else None,
+        "min_classification_confidence": min(confidences) if confidences else None,
+        "max_classification_confidence": max(confidences) if confidences else None
+    }
+
+async def transcribe_in_chunks(report: dict) -> str:
+    """
+    Map-reduce transcription: chunks are summarized in parallel, then one call
+    writes the report from the chunk notes and the locally computed statistics.
+
+    Args:
+        report: Batch report built by aggregate_results (json_output_node)
+
+    Returns:
+        The Mission Batch Report text
+    """
+    classification_results = report["classification_results"]
+    # Capping the chunk count keeps the reduce prompt the same size however large the batch
+    chunk_rows = max(app_config.transcription_chunk_rows,
+                     math.ceil(len(classification_results) / app_config.transcription_max_chunks))
+
+    async def summarize_chunk(start: int) -> str:
+        rows = classification_results[start:start + chunk_rows]
+        # Exact slice statistics plus only the rows worth a note, so the map prompt
+        # stays bounded by transcription_chunk_rows however many rows a chunk holds
+        notable = notable_systems(rows, app_config.transcription_chunk_rows)
+        payload = {
+            "systems": f"{start}-{start + len(rows) - 1}",
+            "summary_metrics": slice_metrics(rows),
+            "notable_systems": notable,
+            "unlisted_systems": len(rows) - len(notable)
+        }
+        # Chunk notes are intermediate, only the final report is streamed as tokens
+        response = await app_config.reasoning_model.ainvoke(
+            [JSON_CHUNK_SUMMARY_PROMPT, {"role": "user", "content": json.dumps(payload)}],
+            config={"tags": [TAG_NOSTREAM]}
+        )
+        return f"Systems {payload['systems']}:\n{response.content}"
+
+    notes = await asyncio.gather(*(
+        summarize_chunk(start) for start in range(0, len(classification_results), chunk_rows)
+    ))
+
+    # The LLM only writes the narrative, every figure comes from the local aggregation
+    response = await app_config.reasoning_model.ainvoke([
+        JSON_REPORT_REDUCE_PROMPT,
+        {"role": "user", "content": f"Batch statistics:\n{json.dumps(batch_statistics(report))}\n\nAnalyst notes:\n\n" + "\n\n".join(notes)}
+    ])
+    return response.content
+
 # JSON transcription node
-def json_transcription_node(state: State) -> State:
-    """Convert JSON results to human-readable text using the JSON transcriber agent"""
-    json_list = state["output_json_list"]
+@timed_node
+async def json_transcription_node(state: State) -> State:
+    """Write the human-readable report from the aggregated batch report"""
+    report = state["json_final_output"]
+
+    # Large batches don't fit in one prompt, summarize them in chunks
+    if len(report["classification_results"]) > app_config.transcription_chunk_rows:
+        return {
+            "transcribed_response": await transcribe_in_chunks(report)
+        }
 
-    # Use the JSON transcriber agent with the proper prompt
-    response = json_transcriber_agent.invoke([
+    # Exact statistics plus the compact per-row classifications, never the input vectors
+    response = await app_config.reasoning_model.ainvoke([
         JSON_TRANSCRIBER_PROMPT,
-        {"role": "user", "content": str(json_list)}
+        {"role": "user", "content": (
+            f"Batch statistics:\n{json.dumps(batch_statistics(report))}\n\n"
+            f"Classification results:\n{json.dumps(report['classification_results'])}"
+        )}
     ])
 
     return {
         "transcribed_response": response.content
     }
 
-def json_output_node(state: State) -> State:
-    """Output the raw JSON results"""
-    transcribed_text = state["transcribed_response"]
-    chain = json_output_prompt | json_output_model
-    result = chain.invoke({"transcribed_response": transcribed_text})
-    
+@timed_node
+async def json_output_node(state: State) -> State:
+    """Aggregate the raw model outputs into the structured batch report (once, reused by the transcription)"""
+    # Aggregating large batches is CPU-bound, keep it off the event loop
     return {
-        "json_final_output": result.content
+        "json_final_output": await asyncio.to_thread(aggregate_results, state["output_json_list"], state.get("parse_errors"))
     }
 
 # Graph Builder
@@ -116,12 +385,22 @@ exoplanet_pipeline_builder.add_node("json_output", json_output_node)
 # Edges
 exoplanet_pipeline_builder.add_edge(START, "vector_parsing")
 exoplanet_pipeline_builder.add_edge("vector_parsing", "exoplanet_detection")
-exoplanet_pipeline_builder.add_edge("exoplanet_detection", "json_to_text")
-exoplanet_pipeline_builder.add_edge("json_to_text", "json_output")
-exoplanet_pipeline_builder.add_edge("json_output", END)
+# The batch report is aggregated once; the transcription narrates it, so its figures match output_json
+exoplanet_pipeline_builder.add_edge("exoplanet_detection", "json_output")
+exoplanet_pipeline_builder.add_edge("json_output", "json_to_text")
+exoplanet_pipeline_builder.add_edge("json_to_text", END)
+
+# Compiled Graph (never checkpointed: its state holds numpy vectors and whole tables)
+exoplanet_pipeline = exoplanet_pipeline_builder.compile(checkpointer=False)
 
-# Compiled Graph
-exoplanet_pipeline = exoplanet_pipeline_builder.compile()
+# Report-only graph for callers that already scored the rows (e.g. streamed uploads)
+exoplanet_report_builder = StateGraph(State)
+exoplanet_report_builder.add_node("json_to_text", json_transcription_node)
+exoplanet_report_builder.add_node("json_output", json_output_node)
+exoplanet_report_builder.add_edge(START, "json_output")
+exoplanet_report_builder.add_edge("json_output", "json_to_text")
+exoplanet_report_builder.add_edge("json_to_text", END)
+exoplanet_report = exoplanet_report_builder.compile(checkpointer=False)
 
 # initial_state = {
 #     "user_input": "1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0",
@@ -131,5 +410,5 @@ exoplanet_pipeline = exoplanet_pipeline_builder.compile()
 #     "transcribed_response": ""
 # }
 
-# result = exoplanet_pipeline.invoke(initial_state)
+# result = asyncio.run(exoplanet_pipeline.ainvoke(initial_state))
 # print(result)
\ No newline at end of file
@@ -1,7 +1,26 @@
 import re
-from typing import List, Optional, Tuple
+import json
+import uuid
+import importlib.util
+import statistics
+import warnings
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 from config import app_config
 
+# Matches integers, floats, and scientific notation (e.g., 1, 1.0, 0.5, .5, 2.45e+06, 2.23e-02)
+NUMBER_PATTERN = re.compile(r'-?\d*\.?\d+(?:[eE][+-]?\d+)?')
+
+# Letters other than the exponent marker; a field containing one is not a number
+HEADER_FIELD_PATTERN = re.compile(r'[A-DF-Za-df-z_]')
+
+# Delimiters recognised in uploaded tables, whitespace is the fallback
+TABLE_DELIMITERS = (',', ';', '\t')
+
+# pyarrow's multithreaded CSV reader parses clean tables; NumPy covers everything else
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
 def parse_vector(input_string: str) -> Tuple[Optional[List[float]], Optional[str]]:
     """
     Parse and validate a 121-element vector from user input.
@@ -16,9 +35,7 @@ def parse_vector(input_string: str) -> Tuple[Optional[List[float]], Optional[str
     """
     try:
         # Extract all numbers (including decimals and scientific notation) from the input string
-        # This regex matches integers, floats, and scientific notation (e.g., 1, 1.0, 0.5, .5, 2.45e+06, 2.23e-02)
-        number_pattern = r'-?\d*\.?\d+(?:[eE][+-]?\d+)?'
-        matches = re.findall(number_pattern, input_string)
+        matches = NUMBER_PATTERN.findall(input_string)
         
         if not matches:
             return None, "No numbers found in input string"
@@ -49,6 +66,174 @@ def format_vector(vector: List[float]) -> str:
     """
     return ", ".join(str(v) for v in vector)
 
+def _bulk_floats(text: str, delimiter: str) -> Optional[np.ndarray]:
+    """Parse delimited numbers in C, or return None if the text is malformed"""
+    with warnings.catch_warnings():
+        # NumPy warns (and will raise in future versions) when it stops on unparsable data
+        warnings.simplefilter("error")
+        try:
+            return np.fromstring(text, dtype=np.float64, sep=delimiter)
+        except (ValueError, DeprecationWarning):
+            return None
+
+def _is_header(line: str, delimiter: Optional[str]) -> bool:
+    """A header row has a non-numeric token in every field"""
+    fields = line.split(delimiter) if delimiter else line.split()
+    return all(HEADER_FIELD_PATTERN.search(field) for field in fields if field.strip())
+
+def _data_start(table: str, delimiter: str, header_scan_lines: int) -> int:
+    """Offset of the first non-blank line after the column headers at the top of the table"""
+    offset = 0
+    scanned = 0
+    while offset < len(table):
+        end = table.find('\n', offset)
+        end = len(table) if end == -1 else end
+        line = table[offset:end].strip()
+        if line:
+            if scanned >= header_scan_lines or not _is_header(line.rstrip(delimiter), delimiter):
+                return offset
+            scanned += 1
+        offset = end + 1
+    return len(table)
+
+def _parse_uniform(table: str, delimiter: Optional[str], expected_sizes: Tuple[int, ...],
+                   header_scan_lines: int) -> Optional[List[np.ndarray]]:
+    """
+    Fast path: parse a clean table in a single pyarrow.csv call.
+
+    Returns None whenever the table needs row-level handling (comments, mixed
+    or unsupported widths, trailing delimiters, non-numeric or missing values),
+    so that parse_table can locate and report the offending rows.
+    """
+    if not HAS_PYARROW or delimiter is None or '#' in table:
+        return None
+
+    body = table[_data_start(table, delimiter, header_scan_lines):]
+    end = body.find('\n')
+    first_line = (body if end == -1 else body[:end]).strip()
+    if not first_line or first_line.endswith(delimiter):
+        return None
+    width = first_line.count(delimiter) + 1
+    if width not in expected_sizes:
+        return None
+
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    names = [f"f{index}" for index in range(width)]
+    try:
+        parsed = pa_csv.read_csv(
+            pa.py_buffer(body.encode()),
+            read_options=pa_csv.ReadOptions(column_names=names),
+            parse_options=pa_csv.ParseOptions(delimiter=delimiter, quote_char=False),
+            convert_options=pa_csv.ConvertOptions(column_types={name: pa.float64() for name in names})
+        )
+    except pa.ArrowException:
+        return None
+    if any(column.null_count for column in parsed.columns):
+        return None
+
+    # Columns are read straight from their Arrow buffers (to_numpy would import pandas),
+    # then stacked row-major so every row is a contiguous view like the NumPy path returns
+    parsed = parsed.combine_chunks()
+    columns = [
+        np.frombuffer(array.buffers()[1], dtype=np.float64, count=len(array), offset=array.offset * 8)
+        for array in (column.chunk(0) for column in parsed.columns)
+    ]
+    return list(np.column_stack(columns))
+
+def parse_table(table: str, expected_sizes: Optional[Tuple[int, ...]] = None,
+                header_scan_lines: int = 5) -> Tuple[List[np.ndarray], List[dict]]:
+    """
+    Parse an uploaded table into numeric feature rows in bulk.
+
+    Clean tables are parsed in one pyarrow.csv call. Otherwise rows are
+    grouped by column count and each group is parsed in a single NumPy call
+    into a 2-D float array; only groups that fail the bulk parse fall back to
+    row-by-row parsing to locate the bad rows.
+
+    Args:
+        table: Raw table text (comma, semicolon, tab or whitespace separated)
+        expected_sizes: Accepted column counts, defaults to the Kepler and K2 vector sizes
+        header_scan_lines: Number of leading rows checked for column headers
+
+    Returns:
+        Tuple of (rows, errors)
+        - rows: 1-D float arrays in table order (views into the per-size 2-D arrays)
+        - errors: {"row": line number, "error": description} for every rejected row
+    """
+    if expected_sizes is None:
+        expected_sizes = (app_config.kepler_vector_size, app_config.k2_vector_size)
+
+    # Detect the delimiter from the first data line (without splitting the whole table yet)
+    delimiter = None
+    offset = 0
+    while offset < len(table):
+        end = table.find('\n', offset)
+        end = len(table) if end == -1 else end
+        line = table[offset:end]
+        if line.strip() and not line.lstrip().startswith('#'):
+            delimiter = next((d for d in TABLE_DELIMITERS if d in line), None)
+            break
+        offset = end + 1
+    separator = delimiter or ' '
+
+    rows = _parse_uniform(table, delimiter, expected_sizes, header_scan_lines)
+    if rows is not None:
+        return rows, []
+
+    lines = table.splitlines()
+
+    errors = []
+    groups: Dict[int, Tuple[List[int], List[str]]] = {}
+    scanned = 0
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        # Skip blank lines and comments (e.g. NASA Exoplanet Archive exports)
+        if not line or line.startswith('#'):
+            continue
+        if delimiter:
+            line = line.rstrip(delimiter)
+
+        # Skip column headers at the top of the table
+        if scanned < header_scan_lines:
+            scanned += 1
+            if _is_header(line, delimiter):
+                continue
+
+        width = line.count(delimiter) + 1 if delimiter else len(line.split())
+        numbers, group_lines = groups.setdefault(width, ([], []))
+        numbers.append(number)
+        group_lines.append(line)
+
+    numbered_rows = []
+    for width, (numbers, group_lines) in groups.items():
+        if width not in expected_sizes:
+            for number, line in zip(numbers, group_lines):
+                if not _is_header(line, delimiter):
+                    errors.append({
+                        "row": number,
+                        "error": f"Unsupported vector size: {width}. Expected {' or '.join(str(size) for size in expected_sizes)}"
+                    })
+            continue
+
+        values = _bulk_floats(separator.join(group_lines), separator)
+        if values is not None and values.size == width * len(group_lines):
+            numbered_rows.extend(zip(numbers, values.reshape(-1, width)))
+            continue
+
+        # Slow path: find the malformed rows of this group
+        for number, line in zip(numbers, group_lines):
+            row = _bulk_floats(line, separator)
+            if row is not None and row.size == width:
+                numbered_rows.append((number, row))
+            elif not _is_header(line, delimiter):
+                errors.append({"row": number, "error": f"Invalid number format in row {number}"})
+
+    numbered_rows.sort(key=lambda item: item[0])
+    errors.sort(key=lambda error: error["row"])
+    return [row for _, row in numbered_rows], errors
+
 def clean(input_string: str, verbose: bool = True) -> Optional[str]:
     """
     Main function to clean and validate vector input.
@@ -69,9 +254,9 @@ def clean(input_string: str, verbose: bool = True) -> Optional[str]:
     
     return format_vector(vector)
 
-def choose_model_api(vector_str: str):
-    """Choose the appropriate model based on vector size"""
-    vector_length = len(vector_str.split(','))
+def choose_model_api(vector):
+    """Choose the appropriate model based on vector size (numeric array or comma-separated string)"""
+    vector_length = len(vector.split(',')) if isinstance(vector, str) else len(vector)
 
     if vector_length == app_config.kepler_vector_size:
         return app_config.kepler_api_name
@@ -82,4 +267,233 @@ def choose_model_api(vector_str: str):
         return {
             "error": f"Unsupported vector size: {vector_length}. Expected {app_config.kepler_vector_size} or {app_config.k2_vector_size}",
             "success": False
-        }
\ No newline at end of file
+        }
+
+def classify_intent(user_input: str, attached_table: Optional[str] = None,
+                    min_numbers: int = 10, min_density: float = 0.8) -> Optional[bool]:
+    """
+    Decide the obvious routing cases locally, without calling the router LLM.
+
+    Args:
+        user_input: Raw user input
+        attached_table: Optional uploaded table
+        min_numbers: Minimum count of numbers for the density rule
+        min_density: Minimum share of the input covered by numbers and separators
+
+    Returns:
+        True if the input clearly belongs to the exoplanet pipeline,
+        None if the intent is ambiguous and the router LLM must decide
+    """
+    # An attached table always goes to the pipeline
+    if attached_table:
+        return True
+
+    text = (user_input or "").strip()
+    if not text:
+        return None
+
+    matches = NUMBER_PATTERN.findall(text)
+
+    # Exactly one Kepler or K2 vector
+    if len(matches) in (app_config.kepler_vector_size, app_config.k2_vector_size):
+        return True
+
+    # Mostly numbers, e.g. a pasted vector of the wrong size
+    numeric_chars = sum(len(match) for match in matches) + text.count(',') + text.count(' ')
+    if len(matches) >= min_numbers and numeric_chars / len(text) >= min_density:
+        return True
+
+    return None
+
+def normalize_result(result) -> dict:
+    """
+    Coerce a raw model result into a dict.
+
+    Args:
+        result: Prediction as returned by the model backend (dict or JSON string)
+
+    Returns:
+        Result dict, or an error dict if it cannot be decoded
+    """
+    if isinstance(result, dict):
+        return result
+    if isinstance(result, str):
+        try:
+            decoded = json.loads(result)
+            if isinstance(decoded, dict):
+                return decoded
+        except json.JSONDecodeError:
+            pass
+    return {"error": f"Unrecognized model output: {str(result)[:200]}", "success": False}
+
+def result_mission(result: dict) -> Optional[str]:
+    """Infer the mission of a result from the size of its input vector (or its recorded "Mission")"""
+    if result.get("Mission"):
+        return result["Mission"]
+    vector = result.get("Input Vector")
+    if not vector:
+        return None
+    size = len(vector.split(',')) if isinstance(vector, str) else len(vector)
+    if size == app_config.kepler_vector_size:
+        return "Kepler"
+    if size == app_config.k2_vector_size:
+        return "K2"
+    return None
+
+def aggregate_results(output_json_list: list, parse_errors: Optional[List[dict]] = None) -> dict:
+    """
+    Build the structured batch report directly from the model outputs.
+
+    Args:
+        output_json_list: One model result (or error dict) per input vector
+        parse_errors: Rows of the uploaded table that could not be parsed
+
+    Returns:
+        Dict with batch metadata, summary metrics, per-row classifications
+        and discovery statistics
+    """
+    classification_results = []
+    counts = {"confirmed": 0, "candidate": 0, "false positive": 0}
+    confidences = []
+    missions = set()
+    failed = 0
+    deferred = 0
+
+    for index, raw_result in enumerate(output_json_list):
+        result = normalize_result(raw_result)
+        succeeded = "error" not in result and result.get("Success", True) is not False and "Prediction" in result
+
+        if not succeeded:
+            failed += 1
+            # Deferred rows were never sent because the backend was down, they can be resubmitted
+            deferred += bool(result.get("deferred"))
+            classification_results.append({
+                "system_index": index,
+                "classification": None,
+                "confidence": None,
+                "probability_distribution": {},
+                "success": False,
+                "deferred": bool(result.get("deferred")),
+                "error": result.get("error", "Model did not return a prediction")
+            })
+            continue
+
+        label = str(result["Prediction"]).strip().lower().replace("_", " ")
+        if label in counts:
+            counts[label] += 1
+
+        confidence = result.get("Confidence")
+        if confidence is not None:
+            confidence = float(confidence)
+            confidences.append(confidence)
+
+        probabilities = result.get("All Probabilities") or {}
+        mission = result_mission(result)
+        if mission:
+            missions.add(mission)
+
+        classification_results.append({
+            "system_index": index,
+            "classification": label.upper(),
+            "confidence": round(confidence, 4) if confidence is not None else None,
+            "probability_distribution": {
+                str(name).strip().lower().replace(" ", "_"): round(float(p), 4) for name, p in probabilities.items()
+            },
+            "success": True
+        })
+
+    total = len(output_json_list)
+    succeeded_total = total - failed
+
+    def share(count: int) -> float:
+        return round(count / succeeded_total, 4) if succeeded_total else 0.0
+
+    success_rate = round(succeeded_total / total, 4) if total else 0.0
+    average_confidence = round(statistics.fmean(confidences), 4) if confidences else None
+    rejected = len(parse_errors or [])
+
+    # Confirmed planets outrank candidates; unscored rows still need a resubmission
+    if counts["confirmed"]:
+        priority_level = "HIGH"
+    elif counts["candidate"]:
+        priority_level = "MEDIUM"
+    elif failed:
+        priority_level = "LOW"
+    else:
+        priority_level = "NONE"
+
+    if not succeeded_total:
+        reliability = "No system could be classified, model reliability cannot be assessed."
+    elif success_rate >= 0.95 and (average_confidence or 0) >= 0.8:
+        reliability = f"High: {success_rate:.0%} of systems classified with {average_confidence:.0%} average confidence."
+    elif success_rate >= 0.8 and (average_confidence or 0) >= 0.6:
+        reliability = f"Moderate: {success_rate:.0%} of systems classified with {average_confidence:.0%} average confidence."
+    else:
+        reliability = (f"Low: {success_rate:.0%} of systems classified"
+                       + (f" with {average_confidence:.0%} average confidence." if average_confidence is not None else "."))
+
+    quality_notes = []
+    if rejected:
+        quality_notes.append(f"{rejected} input row(s) could not be parsed into a Kepler or K2 feature vector.")
+    if failed - deferred:
+        quality_notes.append(f"{failed - deferred} system(s) failed model analysis.")
+    if deferred:
+        quality_notes.append(f"{deferred} system(s) were deferred while the prediction backend was unavailable.")
+
+    feature_counts = {"Kepler": app_config.kepler_vector_size, "K2": app_config.k2_vector_size}
+
+    return {
+        "batch_metadata": {
+            "batch_id": uuid.uuid4().hex[:12],
+            "date": date.today().isoformat(),
+            "mission": " + ".join(sorted(missions)) if missions else None
+        },
+        "summary_metrics": {
+            "total_systems_analyzed": total,
+            "confirmed_exoplanets": counts["confirmed"],
+            "planetary_candidates": counts["candidate"],
+            "false_positives": counts["false positive"],
+            "failed_analyses": failed,
+            "deferred_analyses": deferred,
+            "rejected_rows": rejected,
+            "analysis_success_rate": success_rate,
+            "average_classification_confidence": average_confidence,
+            "median_classification_confidence": round(statistics.median(confidences), 4) if confidences else None,
+            "min_classification_confidence": round(min(confidences), 4) if confidences else None,
+            "max_classification_confidence": round(max(confidences), 4) if confidences else None
+        },
+        "classification_results": classification_results,
+        "model_performance": {
+            "model_type": " + ".join(f"{mission} classifier" for mission in sorted(missions)) if missions else None,
+            "feature_count": feature_counts[next(iter(missions))] if len(missions) == 1 else None,
+            "processing_success": total > 0 and failed == 0,
+            "reliability_assessment": reliability
+        },
+        "data_quality": {
+            "success_flag": total > 0 and failed == 0,
+            "feature_extraction_complete": rejected == 0,
+            "notes": " ".join(quality_notes) or "All rows were parsed and analyzed successfully."
+        },
+        "discovery_statistics": {
+            "false_positive_percentage": share(counts["false positive"]),
+            "candidate_percentage": share(counts["candidate"]),
+            "confirmed_percentage": share(counts["confirmed"])
+        },
+        "parse_errors": parse_errors or [],
+        "recommendations": {
+            "follow_up_required": counts["candidate"] > 0,
+            "priority_level": priority_level,
+            "notes": (
+                f"{counts['confirmed']} confirmed exoplanet(s) and {counts['candidate']} candidate(s) "
+                f"among {succeeded_total} classified system(s)."
+                + (" Candidates should be prioritized for follow-up observation." if counts["candidate"] else "")
+                + (f" Resubmit the {failed} unscored system(s)." if failed else "")
+            ),
+            "candidates_for_follow_up": [
+                row["system_index"] for row in classification_results if row["classification"] == "CANDIDATE"
+            ],
+            "deferred_for_resubmission": [
+                row["system_index"] for row in classification_results if row.get("deferred")
+            ]
+        }
+    }
@@ -0,0 +1,108 @@
+import asyncio
+import codecs
+from typing import AsyncIterator, Awaitable, Callable, List, Tuple
+import numpy as np
+from config import app_config
+from functions import parse_table
+
+# Chunk of parsed rows: (rows, errors)
+RowChunk = Tuple[List[np.ndarray], List[dict]]
+
+
+async def iter_csv_chunks(read: Callable[[int], Awaitable[bytes]], chunk_size: int = 1 << 20) -> AsyncIterator[RowChunk]:
+    """
+    Parse a delimited text upload chunk by chunk as bytes arrive.
+
+    Only complete lines are parsed; a partial trailing line is carried over
+    to the next chunk, so at most one chunk of text is held in memory.
+
+    Args:
+        read: Coroutine returning up to N bytes of the upload (b"" at EOF)
+        chunk_size: Number of bytes read per step
+
+    Yields:
+        (rows, errors) for each chunk, with error row numbers relative to the whole file
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    mission_sizes = (app_config.kepler_vector_size, app_config.k2_vector_size)
+    leftover = ""
+    line_offset = 0
+    first_chunk = True
+
+    while True:
+        data = await read(chunk_size)
+        eof = not data
+        buffer = leftover + decoder.decode(data, final=eof)
+
+        if eof:
+            complete, leftover = buffer, ""
+        else:
+            cut = buffer.rfind('\n')
+            if cut == -1:
+                leftover = buffer
+                continue
+            complete, leftover = buffer[:cut], buffer[cut + 1:]
+
+        if complete:
+            # Headers can only appear at the top of the file; parsing is CPU-bound, keep it off the event loop
+            rows, errors = await asyncio.to_thread(
+                parse_table, complete, mission_sizes, header_scan_lines=5 if first_chunk else 0
+            )
+            for error in errors:
+                error["row"] += line_offset
+            first_chunk = False
+            yield rows, errors
+
+        # An empty line cut off on its own still counts towards the row numbers
+        line_offset += complete.count('\n') + 1
+
+        if eof:
+            return
+
+
+async def iter_parquet_chunks(file, batch_rows: int = 10000) -> AsyncIterator[RowChunk]:
+    """
+    Read a Parquet upload one record batch at a time.
+
+    Args:
+        file: Seekable binary file object
+        batch_rows: Number of rows per record batch
+
+    Yields:
+        (rows, errors) for each record batch
+    """
+    import pyarrow.parquet as pq
+
+    mission_sizes = (app_config.kepler_vector_size, app_config.k2_vector_size)
+    parquet_file = pq.ParquetFile(file)
+    batches = parquet_file.iter_batches(batch_size=batch_rows)
+    row_offset = 0
+
+    while True:
+        # Decoding a record batch is blocking work
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            return
+
+        first_row, row_offset = row_offset + 1, row_offset + batch.num_rows
+        if batch.num_columns not in mission_sizes:
+            yield [], [{
+                "row": f"{first_row}-{row_offset}",
+                "error": f"Unsupported vector size: {batch.num_columns}. Expected {app_config.kepler_vector_size} or {app_config.k2_vector_size}"
+            }]
+            continue
+
+        try:
+            matrix = np.column_stack([
+                column.to_numpy(zero_copy_only=False).astype(np.float64) for column in batch.columns
+            ])
+        except (TypeError, ValueError) as e:
+            yield [], [{"row": f"{first_row}-{row_offset}", "error": f"Non-numeric column: {str(e)}"}]
+            continue
+
+        # Rows with missing values cannot be scored
+        valid = ~np.isnan(matrix).any(axis=1)
+        errors = [
+            {"row": first_row + int(index), "error": "Missing values"} for index in np.flatnonzero(~valid)
+        ]
+        yield list(matrix[valid]), errors
@@ -0,0 +1,287 @@
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from typing import List, Optional, Tuple
+
+# config.py lives in the project root, which is not on the path when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class JobQueue:
+    """
+    Durable SQLite work queue for batch analyses.
+
+    A job stores every row of the uploaded table. Workers claim queued jobs,
+    score the rows that have no result yet in chunks and record progress
+    after each chunk, so a job interrupted by a crash resumes where it
+    stopped once it is requeued.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file shared by the API and the workers
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                user_input TEXT,
+                total_rows INTEGER NOT NULL,
+                scored_rows INTEGER NOT NULL DEFAULT 0,
+                parse_errors TEXT,
+                response TEXT,
+                report TEXT,
+                error TEXT,
+                worker TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+            CREATE TABLE IF NOT EXISTS job_rows (
+                job_id TEXT NOT NULL,
+                row_index INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                result TEXT,
+                PRIMARY KEY (job_id, row_index)
+            );
+        """)
+
+    def enqueue(self, user_input: str, rows: list, parse_errors: List[dict]) -> str:
+        """Store a parsed table as a queued job and return its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, user_input, total_rows, parse_errors, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, user_input, len(rows), json.dumps(parse_errors), now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO job_rows (job_id, row_index, vector) VALUES (?, ?, ?)",
+                ((job_id, index, row.astype("float64").tobytes()) for index, row in enumerate(rows))
+            )
+            self._conn.execute("COMMIT")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Status and progress of a job"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, total_rows, scored_rows, response, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        job_id, status, total_rows, scored_rows, response, error, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "total_rows": total_rows,
+            "scored_rows": scored_rows,
+            "progress": round(scored_rows / total_rows, 4) if total_rows else 1.0,
+            "response": response,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+    def results(self, job_id: str, page: int = 1, page_size: int = 100) -> dict:
+        """One page of per-row results, plus the batch report once the job is done"""
+        offset = (max(page, 1) - 1) * page_size
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT row_index, result FROM job_rows WHERE job_id = ? AND result IS NOT NULL "
+                "ORDER BY row_index LIMIT ? OFFSET ?",
+                (job_id, page_size, offset)
+            ).fetchall()
+            report, parse_errors = self._conn.execute(
+                "SELECT report, parse_errors FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+
+        return {
+            "page": max(page, 1),
+            "page_size": page_size,
+            "results": [{"row_index": index, "result": json.loads(result)} for index, result in rows],
+            "parse_errors": json.loads(parse_errors) if parse_errors else [],
+            "report": json.loads(report) if report else None
+        }
+
+    def claim(self, worker: str) -> Optional[str]:
+        """Atomically take the oldest queued job"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, updated_at = ? WHERE id = ?",
+                    (worker, time.time(), row[0])
+                )
+            self._conn.execute("COMMIT")
+        return row[0] if row else None
+
+    def requeue_stale(self, timeout: float):
+        """Put back running jobs whose worker stopped reporting progress"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND updated_at < ?",
+                (time.time() - timeout,)
+            )
+
+    def pending_rows(self, job_id: str, limit: int) -> List[Tuple[int, bytes]]:
+        """Next rows of a job that have no result yet"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT row_index, vector FROM job_rows WHERE job_id = ? AND result IS NULL "
+                "ORDER BY row_index LIMIT ?",
+                (job_id, limit)
+            ).fetchall()
+
+    def save_results(self, job_id: str, results: List[Tuple[int, object]]):
+        """Record scored rows and bump the job's progress"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany(
+                "UPDATE job_rows SET result = ? WHERE job_id = ? AND row_index = ?",
+                ((json.dumps(result, default=str), job_id, index) for index, result in results)
+            )
+            self._conn.execute(
+                "UPDATE jobs SET scored_rows = "
+                "(SELECT COUNT(*) FROM job_rows WHERE job_id = ? AND result IS NOT NULL), updated_at = ? "
+                "WHERE id = ?",
+                (job_id, time.time(), job_id)
+            )
+            self._conn.execute("COMMIT")
+
+    def heartbeat(self, job_id: str):
+        """Mark a job as still being worked on (keeps requeue_stale from taking it back)"""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def all_results(self, job_id: str) -> Tuple[str, list, List[dict]]:
+        """User input, every row result in order and the parse errors of a job"""
+        with self._lock:
+            user_input, parse_errors = self._conn.execute(
+                "SELECT user_input, parse_errors FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            rows = self._conn.execute(
+                "SELECT result FROM job_rows WHERE job_id = ? ORDER BY row_index", (job_id,)
+            ).fetchall()
+        return user_input, [json.loads(result) for (result,) in rows], json.loads(parse_errors or "[]")
+
+    def finish(self, job_id: str, response: str, report: dict):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', response = ?, report = ?, updated_at = ? WHERE id = ?",
+                (response, json.dumps(report, default=str), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+async def process_job(queue: JobQueue, job_id: str, chunk_rows: int):
+    """Score every pending row of a job, then build its batch report"""
+    import numpy as np
+    from config import app_config
+    from exoplanet_pipeline_subgraph import predict_row, exoplanet_report
+
+    deferred_rounds = 0
+    while True:
+        pending = queue.pending_rows(job_id, chunk_rows)
+        if not pending:
+            break
+
+        vectors = [np.frombuffer(vector, dtype=np.float64) for _, vector in pending]
+        results = await asyncio.gather(*(predict_row(vector) for vector in vectors))
+
+        # Deferred rows stay pending and are retried once the backend's circuit breaker lets calls through,
+        # up to job_max_deferred_rounds times; after that they are saved as deferred so the job can finish
+        give_up = deferred_rounds >= app_config.job_max_deferred_rounds
+        scored = [
+            (index, result) for (index, _), result in zip(pending, results)
+            if give_up or not (isinstance(result, dict) and result.get("deferred"))
+        ]
+        if scored:
+            queue.save_results(job_id, scored)
+        if len(scored) < len(pending):
+            deferred_rounds += 1
+            queue.heartbeat(job_id)
+            await asyncio.sleep(app_config.prediction_breaker_reset_seconds)
+            queue.heartbeat(job_id)
+
+    user_input, output_json_list, parse_errors = queue.all_results(job_id)
+    report = await exoplanet_report.ainvoke({
+        "user_input": user_input,
+        "output_json_list": output_json_list,
+        "parse_errors": parse_errors
+    })
+    queue.finish(job_id, report["transcribed_response"], report["json_final_output"])
+
+
+async def worker_loop(worker: str):
+    """Claim and process jobs until the process is stopped"""
+    from config import app_config
+
+    from exoplanet_pipeline_subgraph import prediction_cache
+
+    queue = JobQueue(app_config.jobs_db_path)
+    prediction_cache.open()
+    print(f"Job worker {worker} polling {app_config.jobs_db_path}")
+
+    while True:
+        queue.requeue_stale(app_config.job_stale_seconds)
+        job_id = queue.claim(worker)
+        if job_id is None:
+            await asyncio.sleep(app_config.job_poll_seconds)
+            continue
+
+        print(f"Worker {worker} processing job {job_id}")
+        try:
+            await process_job(queue, job_id, app_config.job_chunk_rows)
+        except Exception as e:
+            queue.fail(job_id, f"Error processing job: {str(e)}")
+
+
+def run_worker(index: int):
+    asyncio.run(worker_loop(f"{os.getpid()}-{index}"))
+
+
+if __name__ == "__main__":
+    # Run as: python src/jobs.py [--workers N]
+    import argparse
+    import multiprocessing
+
+    parser = argparse.ArgumentParser(description="Drain the batch analysis job queue")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        run_worker(0)
+    else:
+        processes = [multiprocessing.Process(target=run_worker, args=(index,)) for index in range(args.workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
@@ -1,56 +1,95 @@
-import operator
+from functools import cache
 from config import app_config
 from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
 from typing_extensions import Annotated, TypedDict
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, AIMessage
 from exoplanet_pipeline_subgraph import exoplanet_pipeline
+from functions import classify_intent
+from memory import trim_history, compact_history
+from cache import ResponseCache
+from metrics import metrics, timed_node
 from prompts import *
 
-# Initializing models
-router = app_config.routing_model
-conversation_agent = app_config.conversation_model
-
 # Prompt Templates
 router_prompt = ChatPromptTemplate.from_messages([
     ("system", ROUTER_PROMPT),
     ("placeholder", "{messages}"),  # Include conversation history
     ("user", "{user_input}")
 ])
-router_chain = router_prompt | router
 
 conversation_prompt = ChatPromptTemplate.from_messages([
     ("system", CONVERSATION_AGENT_PROMPT),
     ("placeholder", "{messages}"),  # Include conversation history
     ("user", "{user_input}")
 ])
-conversation_chain = conversation_prompt | conversation_agent
+
+# Chains are built on first use so importing the workflow creates no model clients
+@cache
+def get_router_chain():
+    return router_prompt | app_config.routing_model
+
+@cache
+def get_conversation_chain():
+    return conversation_prompt | app_config.conversation_model
+
+# Opt-in cache of LLM outputs for history-free questions (None when disabled)
+response_cache = ResponseCache(
+    max_size=app_config.response_cache_size,
+    ttl_seconds=app_config.response_cache_ttl_seconds,
+    db_path=app_config.response_cache_path
+) if app_config.response_cache_enabled else None
+
+def cacheable_question(state: dict, history: list) -> str | None:
+    """The question text to use as a response cache key, or None when the answer may depend on context"""
+    if response_cache is None or history or state.get("attached_table"):
+        return None
+    return state["user_input"]
 
 # General Graph State
 class MainWorkflowState(TypedDict):
-    messages: Annotated[list, operator.add] # Accumulated messages (short term memory)
+    messages: Annotated[list, add_messages] # Accumulated messages (short term memory, compacted to a token budget)
     user_input: str # Raw user input
     attached_table: str | None # Optional uploaded table containing vectors
     response: str # Final response to user
     routing_decision: bool # True for exoplanet pipeline, False for conversation
-    output_json: list[dict] | None
+    output_json: dict | None # Structured batch report from the exoplanet pipeline
 
 # Nodes logic
-def routing_node(state: MainWorkflowState) -> MainWorkflowState:
+@timed_node
+async def routing_node(state: MainWorkflowState) -> MainWorkflowState:
     """Classify user intent and determine routing path"""
 
-    # Get conversation history (excluding current input)
-    messages = state.get("messages", [])
-
-    # Invoke router LLM with user input and history
-    routing_decision = router_chain.invoke({
-        "messages": messages,
-        "user_input": state["user_input"]
-    })
-
-    # Convert routing decision to boolean
-    decision_text = routing_decision.content.strip().lower()
-    is_exoplanet = any(keyword in decision_text for keyword in ["exoplanet", "detection", "predict"]) or state.get("attached_table") is not None
+    # Skip the router LLM when the intent is obvious (table attached, numeric vector)
+    is_exoplanet = classify_intent(state["user_input"], state.get("attached_table"))
+    if is_exoplanet is not None:
+        metrics.increment("routing_decisions_total", path="fast_path")
+    else:
+        # Get conversation history (excluding current input), trimmed to the token budget
+        messages = trim_history(state.get("messages", []))
+
+        # A history-free question routes the same way every time
+        question = cacheable_question(state, state.get("messages", []))
+        if question is not None:
+            is_exoplanet = await response_cache.get("router", question)
+
+        if is_exoplanet is not None:
+            metrics.increment("routing_decisions_total", path="cache")
+        else:
+            metrics.increment("routing_decisions_total", path="llm")
+
+            # Invoke router LLM with user input and history
+            routing_decision = await get_router_chain().ainvoke({
+                "messages": messages,
+                "user_input": state["user_input"]
+            })
+
+            # Convert routing decision to boolean
+            decision_text = routing_decision.content.strip().lower()
+            is_exoplanet = any(keyword in decision_text for keyword in ["exoplanet", "detection", "predict"])
+            if question is not None:
+                response_cache.set("router", question, is_exoplanet)
 
     # Add current user input to messages
     return {
@@ -59,25 +98,35 @@ def routing_node(state: MainWorkflowState) -> MainWorkflowState:
     }
 
 # Conversation node
-def conversation_node(state: MainWorkflowState) -> MainWorkflowState:
+@timed_node
+async def conversation_node(state: MainWorkflowState) -> MainWorkflowState:
     """Handle conversational queries"""
 
-    # Get conversation history
-    messages = state.get("messages", [])
+    # Get conversation history, trimmed to the token budget
+    messages = trim_history(state.get("messages", []))
 
-    response = conversation_chain.invoke({
-        "messages": messages,
-        "user_input": state["user_input"]
-    })
+    # Repeated history-free questions are answered from the cache (the last message is the current input)
+    question = cacheable_question(state, state.get("messages", [])[:-1])
+    content = await response_cache.get("conversation", question) if question is not None else None
+
+    if content is None:
+        response = await get_conversation_chain().ainvoke({
+            "messages": messages,
+            "user_input": state["user_input"]
+        })
+        content = response.content
+        if question is not None:
+            response_cache.set("conversation", question, content)
 
     # Add AI response to messages and set response
     return {
-        "messages": [AIMessage(content=response.content)],
-        "response": response.content
+        "messages": [AIMessage(content=content)],
+        "response": content
     }
 
 # Exoplanet Detection Pipeline node
-def exoplanet_pipeline_node(state: MainWorkflowState) -> MainWorkflowState:
+@timed_node
+async def exoplanet_pipeline_node(state: MainWorkflowState) -> MainWorkflowState:
     """Wrapper that converts MainState ↔ ExoplanetPipelineState"""
     
     # Convert MainState → PipelineState
@@ -85,13 +134,14 @@ def exoplanet_pipeline_node(state: MainWorkflowState) -> MainWorkflowState:
         "user_input": state["user_input"], # Pass through
         "attached_table": state.get("attached_table"),  # Pass through (safe access)
         "vector_list": [],  # Will be populated by parse_vectors_node
+        "parse_errors": [],  # Will be populated by parse_vectors_node
         "output_json_list": [], # Will be populated by exoplanet_detection_node
         "transcribed_response": None,  # Will be populated by json_transcription_node
         "json_final_output": None  # Will be populated by json_output_node
     }
     
     # Run the pipeline
-    pipeline_result = exoplanet_pipeline.invoke(pipeline_input)
+    pipeline_result = await exoplanet_pipeline.ainvoke(pipeline_input)
     
     # Add AI response to messages and convert PipelineState → MainState
     return {
@@ -100,6 +150,20 @@ def exoplanet_pipeline_node(state: MainWorkflowState) -> MainWorkflowState:
         "output_json": pipeline_result["json_final_output"]
     }
 
+# Memory compaction node
+@timed_node
+def compact_memory_node(state: MainWorkflowState) -> MainWorkflowState:
+    """
+    Fold turns beyond the token budget into a summary and drop the turn's bulk
+    data, so checkpointed sessions stay bounded. Callers read the report from
+    the exoplanet_detection node's update, not from the final state.
+    """
+    return {
+        "messages": compact_history(state.get("messages", [])),
+        "attached_table": None,
+        "output_json": None
+    }
+
 # Router node
 def routing_logic(state: MainWorkflowState) -> str:
     """Determine next node based on routing decision boolean"""
@@ -116,6 +180,7 @@ workflow_builder = StateGraph(MainWorkflowState)
 workflow_builder.add_node("routing", routing_node)
 workflow_builder.add_node("conversation", conversation_node)
 workflow_builder.add_node("exoplanet_detection", exoplanet_pipeline_node)
+workflow_builder.add_node("compact_memory", compact_memory_node)
 
 # Edges
 workflow_builder.add_edge(START, "routing")
@@ -127,16 +192,9 @@ workflow_builder.add_conditional_edges(
         "exoplanet_detection": "exoplanet_detection",
     },
 )
-workflow_builder.add_edge("exoplanet_detection", END)
-workflow_builder.add_edge("conversation", END)
+workflow_builder.add_edge("exoplanet_detection", "compact_memory")
+workflow_builder.add_edge("conversation", "compact_memory")
+workflow_builder.add_edge("compact_memory", END)
 
+# Stateless workflow; backend_api compiles a checkpointed copy for requests with a session_id
 main_workflow = workflow_builder.compile()
-
-# For persistent memory across sessions (uncomment to enable)
-# from langgraph.checkpoint.memory import MemorySaver
-# memory = MemorySaver()
-# main_workflow = workflow_builder.compile(checkpointer=memory)
-
-# # Invoke with thread_id for persistence
-# config = {"configurable": {"thread_id": "user-123"}}
-# result = main_workflow.invoke(initial_state, config=config)
\ No newline at end of file
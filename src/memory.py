@@ -0,0 +1,153 @@
+import time
+import sqlite3
+import threading
+from typing import List
+from langchain_core.messages import BaseMessage, SystemMessage, RemoveMessage
+from langchain_core.messages.utils import trim_messages, count_tokens_approximately
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from config import app_config
+
+# Marks the message holding the compacted older turns
+SUMMARY_PREFIX = "Summary of earlier conversation:"
+
+
+def trim_history(messages: List[BaseMessage], max_tokens: int = None) -> List[BaseMessage]:
+    """
+    Most recent messages that fit in the token budget, starting on a user turn.
+    The compacted summary of older turns is kept when present.
+    """
+    if not messages:
+        return []
+
+    max_tokens = max_tokens or app_config.memory_token_budget
+    return trim_messages(
+        messages,
+        max_tokens=max_tokens,
+        token_counter=count_tokens_approximately,
+        strategy="last",
+        start_on="human",
+        include_system=True,
+        allow_partial=False
+    )
+
+
+def compact_history(messages: List[BaseMessage], max_tokens: int = None) -> list:
+    """
+    Fold turns that no longer fit the token budget into one short summary message.
+
+    Returns:
+        Message updates for the `messages` channel (empty when nothing to compact)
+    """
+    max_tokens = max_tokens or app_config.memory_token_budget
+    if count_tokens_approximately(messages) <= max_tokens:
+        return []
+
+    # Pull out the summary left by a previous compaction
+    lines = []
+    if isinstance(messages[0], SystemMessage) and str(messages[0].content).startswith(SUMMARY_PREFIX):
+        lines = str(messages[0].content)[len(SUMMARY_PREFIX):].strip().splitlines()
+        messages = messages[1:]
+
+    # Recent turns keep half the budget, the summary gets the other half
+    kept = trim_messages(
+        messages,
+        max_tokens=max_tokens // 2,
+        token_counter=count_tokens_approximately,
+        strategy="last",
+        start_on="human",
+        allow_partial=False
+    )
+    kept_ids = {message.id for message in kept}
+    dropped = [message for message in messages if message.id not in kept_ids]
+    if not dropped:
+        return []
+
+    for message in dropped:
+        role = "User" if message.type == "human" else "Assistant"
+        lines.append(f"- {role}: {' '.join(str(message.content).split())[:app_config.memory_summary_chars]}")
+
+    # Keep the newest summary lines that fit
+    summary_lines = []
+    for line in reversed(lines):
+        if count_tokens_approximately([SystemMessage(content="\n".join([line] + summary_lines))]) > max_tokens // 2:
+            break
+        summary_lines.insert(0, line)
+
+    summary = SystemMessage(content=f"{SUMMARY_PREFIX}\n" + "\n".join(summary_lines))
+    return [RemoveMessage(id=REMOVE_ALL_MESSAGES), summary] + kept
+
+
+def open_checkpointer():
+    """Async context manager yielding the SQLite checkpointer for session memory"""
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    return AsyncSqliteSaver.from_conn_string(app_config.memory_db_path)
+
+
+class SessionRetention:
+    """
+    Keeps the session checkpoint database from growing without bound.
+
+    After every turn only the latest checkpoint of the thread is kept (the
+    graph resumes from it, older ones are history nobody reads), and threads
+    idle for longer than `ttl_seconds` are deleted altogether.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, expire_interval: float = 60):
+        """
+        Args:
+            path: SQLite file of the checkpointer
+            ttl_seconds: Idle time after which a session is forgotten
+            expire_interval: Minimum seconds between two sweeps for idle sessions
+        """
+        self.ttl_seconds = ttl_seconds
+        self.expire_interval = expire_interval
+        self._last_expire = 0.0
+        self._lock = threading.Lock()
+        # Same file as the checkpointer, which writes through its own connection (WAL)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def prune(self, thread_id: str):
+        """Record activity on a thread and drop its superseded checkpoints (blocking)"""
+        now = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute("INSERT OR REPLACE INTO session_activity VALUES (?, ?)", (thread_id, now))
+                    # Checkpoint ids are time-ordered, the graph resumes from the greatest one
+                    (latest,) = self._conn.execute(
+                        "SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ?", (thread_id,)
+                    ).fetchone()
+                    if latest is not None:
+                        for table in ("checkpoints", "writes"):
+                            self._conn.execute(
+                                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id < ?", (thread_id, latest)
+                            )
+            except sqlite3.OperationalError as e:
+                # The checkpointer creates its tables on first use
+                print(f"Session pruning skipped: {e}")
+                return
+
+        if now - self._last_expire >= self.expire_interval:
+            self._last_expire = now
+            self.expire()
+
+    def expire(self):
+        """Delete every thread idle for longer than ttl_seconds (blocking)"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            try:
+                with self._conn:
+                    stale = "SELECT thread_id FROM session_activity WHERE updated_at < ?"
+                    for table in ("checkpoints", "writes", "session_activity"):
+                        self._conn.execute(f"DELETE FROM {table} WHERE thread_id IN ({stale})", (cutoff,))
+            except sqlite3.OperationalError as e:
+                print(f"Session expiry skipped: {e}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,207 @@
+import os
+import time
+import asyncio
+import threading
+import functools
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Tuple
+
+# Histogram buckets (upper bounds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+
+# Every API worker keeps its own registry: series carry the process id so scrapes
+# of different workers behind one port are not mistaken for the same counter going backwards
+WORKER = str(os.getpid())
+
+
+class Metrics:
+    """
+    Process-wide registry of labelled counters and histograms,
+    rendered in the Prometheus text exposition format with a `worker` label.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[Tuple, float]] = defaultdict(lambda: defaultdict(float))
+        # name -> labels -> [bucket counts..., sum, count]
+        self._histograms: Dict[str, Dict[Tuple, list]] = defaultdict(dict)
+        self._buckets: Dict[str, tuple] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, text: str, buckets: tuple = None):
+        """Register the help text (and histogram buckets) of a metric"""
+        self._help[name] = text
+        if buckets is not None:
+            self._buckets[name] = buckets
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Add `value` to the counter identified by `name` and `labels`"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[name][key] += value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation in a histogram"""
+        buckets = self._buckets.get(name, LATENCY_BUCKETS)
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms[name].get(key)
+            if series is None:
+                series = self._histograms[name][key] = [0] * (len(buckets) + 2)
+            index = bisect_left(buckets, value)
+            if index < len(buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self) -> dict:
+        """Current counter values as {name: {"label=value,...": count}}"""
+        with self._lock:
+            return {
+                name: {",".join(f"{k}={v}" for k, v in key) or "total": count for key, count in series.items()}
+                for name, series in self._counters.items()
+            }
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._header(lines, name, "counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                buckets = self._buckets.get(name, LATENCY_BUCKETS)
+                self._header(lines, name, "histogram")
+                for key, values in series.items():
+                    cumulative = 0
+                    for bound, count in zip(buckets, values):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {values[-1]}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(values[-2])}")
+                    lines.append(f"{name}_count{_labels(key)} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: list, name: str, kind: str):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def render_gauges(name: str, text: str, samples: Dict[Tuple, float]) -> str:
+    """Prometheus text for gauge values owned by other components (e.g. cache sizes)"""
+    lines = [f"# HELP {name} {text}", f"# TYPE {name} gauge"]
+    for key, value in samples.items():
+        if value is not None:
+            lines.append(f"{name}{_labels(key)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(key: Tuple) -> str:
+    key = (("worker", WORKER),) + tuple(key)
+
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in key) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+metrics = Metrics()
+
+metrics.describe("graph_node_duration_seconds", "Duration of LangGraph node executions")
+metrics.describe("graph_node_errors_total", "LangGraph node executions that raised")
+metrics.describe("llm_call_duration_seconds", "Latency of LLM calls")
+metrics.describe("llm_tokens_total", "Tokens used by LLM calls")
+metrics.describe("llm_errors_total", "LLM calls that raised")
+metrics.describe("llm_queue_wait_seconds", "Time LLM calls waited for rate-limit budget and a concurrency slot")
+metrics.describe("llm_rate_limited_total", "LLM calls answered with HTTP 429")
+metrics.describe("prediction_call_duration_seconds", "Latency of calls to the prediction backend")
+metrics.describe("prediction_errors_total", "Rows whose prediction failed")
+metrics.describe("pipeline_rows_per_request", "Vectors scored per pipeline run", buckets=SIZE_BUCKETS)
+metrics.describe("http_request_duration_seconds", "HTTP request latency")
+metrics.describe("http_requests_total", "HTTP requests by path and status")
+metrics.describe("routing_decisions_total", "Routing decisions by path (fast_path, cache or llm)")
+
+
+def timed_node(func):
+    """Record duration and errors of a graph node under its function name"""
+    node = func.__name__
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                metrics.increment("graph_node_errors_total", node=node)
+                raise
+            finally:
+                metrics.observe("graph_node_duration_seconds", time.perf_counter() - start, node=node)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            metrics.increment("graph_node_errors_total", node=node)
+            raise
+        finally:
+            metrics.observe("graph_node_duration_seconds", time.perf_counter() - start, node=node)
+    return wrapper
+
+
+def llm_metrics_callback():
+    """
+    LangChain callback handler recording latency, token counts and errors
+    of every chat model call, labelled by model name.
+    """
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMMetricsCallback(BaseCallbackHandler):
+        # Cheap bookkeeping, no need to hop to an executor for async calls
+        run_inline = True
+
+        def __init__(self):
+            self._runs: Dict = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, invocation_params=None, **kwargs):
+            model = (invocation_params or {}).get("model") or (metadata or {}).get("ls_model_name") or "unknown"
+            self._runs[run_id] = (time.perf_counter(), model)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            start, model = self._runs.pop(run_id, (None, "unknown"))
+            if start is not None:
+                metrics.observe("llm_call_duration_seconds", time.perf_counter() - start, model=model)
+
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            input_tokens = usage.get("prompt_tokens")
+            output_tokens = usage.get("completion_tokens")
+            if input_tokens is None:
+                # Streaming calls report usage on the message instead
+                for generations in response.generations:
+                    for generation in generations:
+                        usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                        input_tokens = (input_tokens or 0) + usage_metadata.get("input_tokens", 0)
+                        output_tokens = (output_tokens or 0) + usage_metadata.get("output_tokens", 0)
+
+            if input_tokens:
+                metrics.increment("llm_tokens_total", input_tokens, model=model, kind="input")
+            if output_tokens:
+                metrics.increment("llm_tokens_total", output_tokens, model=model, kind="output")
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            _, model = self._runs.pop(run_id, (None, "unknown"))
+            metrics.increment("llm_errors_total", model=model, error=type(error).__name__)
+
+    return LLMMetricsCallback()
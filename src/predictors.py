@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+# Class order used when an artifact does not carry its own labels
+DEFAULT_LABELS = ["false positive", "candidate", "confirmed"]
+
+
+class Predictor(ABC):
+    """
+    Interface shared by all exoplanet model backends.
+
+    `predict` scores one numeric feature vector (a float64 NumPy array) for a
+    mission API (`/predict_kepler` or `/predict_k2`) and returns the same
+    result dict as the Gradio Space.
+    Backends that can score many rows in one call set `supports_batching`
+    and override `predict_batch`.
+    """
+
+    supports_batching: bool = False
+
+    @abstractmethod
+    def predict(self, input_vector, api_name: str) -> Any:
+        """Score one vector for a mission API"""
+
+    def predict_batch(self, vectors: list, api_name: str) -> List[Any]:
+        """Score several vectors for one mission API, in order"""
+        return [self.predict(input_vector=vector, api_name=api_name) for vector in vectors]
+
+    def warm_up(self):
+        """Pay one-off setup costs (connections, model loading) before the first request"""
+
+
+class GradioPredictor(Predictor):
+    """
+    Remote backend calling the Hugging Face Gradio Space.
+    """
+
+    def __init__(self, space: str, hf_token: Optional[str] = None, httpx_kwargs: Optional[dict] = None):
+        """
+        Args:
+            space: Hugging Face Space id hosting the Kepler/K2 models
+            hf_token: Optional Hugging Face token
+            httpx_kwargs: Extra arguments for the client's HTTP calls (e.g. timeout)
+        """
+        from gradio_client import Client
+
+        # Connecting performs the handshake with the Space, including a cold start if it was asleep
+        self.client = Client(space, hf_token, httpx_kwargs=httpx_kwargs)
+
+    def predict(self, input_vector, api_name: str) -> Any:
+        # The Space takes vectors as comma-separated strings
+        if not isinstance(input_vector, str):
+            from functions import format_vector
+            input_vector = format_vector(input_vector.tolist())
+
+        return self.client.predict(
+            input_vector=input_vector,
+            api_name=api_name
+        )
+
+
+class LocalPredictor(Predictor):
+    """
+    In-process backend scoring whole batches with exported model artifacts.
+
+    For each mission the model directory holds one artifact named after the
+    mission (`kepler.joblib`, `k2.keras`, ...). scikit-learn artifacts
+    (`.joblib`, `.pkl`) must expose `predict_proba`; TensorFlow artifacts
+    (`.keras`, `.h5`) must output one probability per class. Class names come
+    from the estimator's `classes_`, from an optional `<mission>_labels.json`
+    file, or default to DEFAULT_LABELS. No network access is needed.
+    """
+
+    supports_batching = True
+
+    SKLEARN_EXTENSIONS = (".joblib", ".pkl")
+    TENSORFLOW_EXTENSIONS = (".keras", ".h5")
+
+    def __init__(self, model_dir: str, missions: Dict[str, str]):
+        """
+        Args:
+            model_dir: Directory containing the exported artifacts
+            missions: Mapping of mission API name to artifact base name
+        """
+        self.model_dir = model_dir
+        self.missions = missions
+        self._models: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, api_name: str) -> tuple:
+        """Load (and memoize) the artifact and class labels for a mission API"""
+        with self._lock:
+            if api_name in self._models:
+                return self._models[api_name]
+
+            mission = self.missions.get(api_name)
+            if mission is None:
+                raise ValueError(f"No local model configured for {api_name}")
+
+            for extension in self.SKLEARN_EXTENSIONS + self.TENSORFLOW_EXTENSIONS:
+                path = os.path.join(self.model_dir, mission + extension)
+                if os.path.exists(path):
+                    break
+            else:
+                raise FileNotFoundError(f"No model artifact for '{mission}' in {self.model_dir}")
+
+            if extension in self.SKLEARN_EXTENSIONS:
+                import joblib
+                model = joblib.load(path)
+                kind = "sklearn"
+            else:
+                import tensorflow as tf
+                model = tf.keras.models.load_model(path)
+                kind = "tensorflow"
+
+            self._models[api_name] = (kind, model, self._labels(model, mission))
+            return self._models[api_name]
+
+    def warm_up(self):
+        for api_name in self.missions:
+            self._load(api_name)
+
+    def _labels(self, model, mission: str) -> List[str]:
+        """Resolve the class names of an artifact"""
+        labels_path = os.path.join(self.model_dir, f"{mission}_labels.json")
+        if os.path.exists(labels_path):
+            with open(labels_path) as f:
+                return [str(label) for label in json.load(f)]
+        classes = getattr(model, "classes_", None)
+        if classes is not None and all(isinstance(label, str) for label in classes):
+            return list(classes)
+        return DEFAULT_LABELS
+
+    def predict(self, input_vector, api_name: str) -> Any:
+        return self.predict_batch([input_vector], api_name)[0]
+
+    def predict_batch(self, vectors: list, api_name: str) -> List[Any]:
+        import numpy as np
+
+        kind, model, labels = self._load(api_name)
+        features = np.vstack([np.asarray(vector, dtype=np.float64) for vector in vectors])
+
+        if kind == "sklearn":
+            probabilities = model.predict_proba(features)
+        else:
+            probabilities = model.predict(features, verbose=0)
+
+        results = []
+        for vector, row in zip(vectors, np.asarray(probabilities)):
+            best = int(row.argmax())
+            results.append({
+                "Prediction": labels[best],
+                "All Probabilities": {label: float(p) for label, p in zip(labels, row)},
+                "Confidence": float(row[best]),
+                "Input Vector": np.asarray(vector).tolist(),
+                "Success": True
+            })
+        return results
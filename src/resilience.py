@@ -0,0 +1,174 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+import httpx
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the breaker opens and calls are
+    refused for `reset_seconds`. It then lets a single trial call through
+    (half-open): a success closes it again, a failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            reset_seconds: Time the breaker stays open before a trial call
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+        # Counters
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """closed, open, or half_open (open but due for a trial call)"""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through now (claims the trial call when half-open)"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self.times_opened += 1
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Free the half-open trial slot of a call that ended without an outcome (e.g. cancelled)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected
+        }
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """
+    Whether an error shows the backend itself is unhealthy: timeouts, connection
+    errors and 5xx responses. Errors about a single request (invalid input, a
+    model error on one row, 4xx) say nothing about the backend's health.
+    """
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError, httpx.TransportError)):
+        return True
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies, used to pick the hedging delay"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Args:
+            window: Number of recent latencies kept
+            min_samples: Samples needed before percentiles are reported
+        """
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-th percentile of the window, None until there are enough samples"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def hedged(call: Callable[[], Awaitable[Any]], timeout: float, hedge_after: Optional[float] = None,
+                 can_hedge: Callable[[], bool] = lambda: True,
+                 hedge_call: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+    """
+    Await `call()` under a deadline, sending one duplicate if it is slow.
+
+    Args:
+        call: Coroutine factory for the first call
+        timeout: Deadline in seconds for the whole operation
+        hedge_after: Delay before the duplicate is sent (no hedging when None)
+        can_hedge: Checked before hedging, e.g. whether spare capacity is available
+        hedge_call: Coroutine factory for the duplicate, e.g. one that takes a capacity slot (defaults to call)
+
+    Returns:
+        The result of whichever call succeeds first
+
+    Raises:
+        TimeoutError: No call succeeded before the deadline
+        Exception: The error of the last call to fail, when every call failed
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    tasks = {asyncio.ensure_future(call())}
+    hedge_pending = hedge_after is not None and hedge_after < timeout
+
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"No response within {timeout:.1f}s")
+
+            wait = min(remaining, hedge_after) if hedge_pending else remaining
+            done, tasks = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+
+            error = None
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if error is not None and not tasks:
+                raise error
+
+            # Still waiting once the hedging delay has passed: race a duplicate
+            if not done and hedge_pending:
+                hedge_pending = False
+                if can_hedge():
+                    tasks.add(asyncio.ensure_future((hedge_call or call)()))
+    finally:
+        # The losing call is abandoned (its worker thread still runs it to completion)
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,380 @@
+import re
+import json
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from typing import Dict, Optional
+import httpx
+from metrics import metrics
+
+# Header the chat models use to tell the scheduler their priority (stripped before sending)
+PRIORITY_HEADER = "x-llm-priority"
+
+# Lower runs first when calls compete for a concurrency slot
+PRIORITY_ROUTER = 0
+PRIORITY_CONVERSATION = 1
+PRIORITY_REASONING = 2
+
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds in a rate-limit reset value.
+
+    Args:
+        value: Plain seconds ("7") or a Go-style duration ("2m59.56s", "120ms")
+
+    Returns:
+        Seconds, or None if the value is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """
+    Budget refilled continuously at `per_minute` units per minute, holding at most one minute's worth.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = max(1.0, per_minute)
+        self.available = self.per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.per_minute, self.available + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)"""
+        self._refill()
+        # A call larger than the whole budget waits for a full bucket instead of forever
+        missing = min(amount, self.per_minute) - self.available
+        return max(0.0, missing * 60 / self.per_minute)
+
+    def take(self, amount: float):
+        self._refill()
+        self.available -= amount
+
+    def refund(self, amount: float):
+        """Give back units taken for a call that was never sent"""
+        self._refill()
+        self.available = min(self.per_minute, self.available + amount)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float]):
+        """Align the budget with the limit and remaining values reported by the API"""
+        if limit:
+            self.per_minute = limit
+        if remaining is not None:
+            self._refill()
+            self.available = min(self.available, remaining)
+
+
+class ModelBudget:
+    """Per-model request and token buckets plus a cool-down set by 429 responses"""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+
+    def wait_time(self, tokens: float) -> float:
+        return max(
+            self.blocked_until - time.monotonic(),
+            self.requests.wait_time(1),
+            self.tokens.wait_time(tokens)
+        )
+
+
+class LLMScheduler:
+    """
+    Central admission control for chat completion calls on one Groq account.
+
+    - Token buckets per model for requests and tokens per minute
+    - Adaptive concurrency (AIMD): grows while the rate-limit headers show
+      headroom, halves on every 429
+    - Priority between callers when they compete for a concurrency slot
+    - Retries of 429s with jittered exponential backoff (see ScheduledTransport)
+    """
+
+    def __init__(self, rate_limits: Dict[str, dict] = None, default_rpm: float = 1000, default_tpm: float = 250000,
+                 max_concurrency: int = 32, max_retries: int = 4, backoff_base: float = 0.5,
+                 backoff_max: float = 20.0, max_queue_seconds: float = 30.0, completion_tokens: int = 512,
+                 processes: int = 1):
+        """
+        Args:
+            rate_limits: Per-model overrides, e.g. {"openai/gpt-oss-20b": {"rpm": 30, "tpm": 8000}}
+            default_rpm: Requests per minute for models without an override
+            default_tpm: Tokens per minute for models without an override (replaced by the API's limit header)
+            max_concurrency: Upper bound of calls in flight across all models
+            max_retries: Retries of a rate-limited call before the 429 is returned to the caller
+            backoff_base: First backoff delay in seconds, doubled on every retry
+            backoff_max: Longest backoff delay in seconds
+            max_queue_seconds: Longest a call waits for budget before it is rejected with a 429
+            completion_tokens: Expected completion size when a call sets no max_tokens
+            processes: Processes sharing the account; each one schedules against its share of every limit
+        """
+        self.share = 1 / max(1, processes)
+        self.rate_limits = rate_limits or {}
+        self.default_rpm = default_rpm * self.share
+        self.default_tpm = default_tpm * self.share
+        self.max_concurrency = max(1, int(max_concurrency * self.share))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_queue_seconds = max_queue_seconds
+        self.completion_tokens = completion_tokens
+
+        self.concurrency_limit = float(self.max_concurrency)
+        self.active = 0
+        self._budgets: Dict[str, ModelBudget] = {}
+        self._waiters: list = []
+        self._sequence = itertools.count()
+
+        # Counters
+        self.calls = 0
+        self.rate_limited = 0
+        self.rejected = 0
+
+    def budget(self, model: str) -> ModelBudget:
+        if model not in self._budgets:
+            limits = self.rate_limits.get(model, {})
+            self._budgets[model] = ModelBudget(
+                limits["rpm"] * self.share if "rpm" in limits else self.default_rpm,
+                limits["tpm"] * self.share if "tpm" in limits else self.default_tpm
+            )
+        return self._budgets[model]
+
+    def estimate_tokens(self, body: dict) -> int:
+        """Rough prompt size (4 characters per token) plus the expected completion"""
+        prompt = sum(len(str(message.get("content", ""))) for message in body.get("messages", [])) // 4
+        completion = body.get("max_completion_tokens") or body.get("max_tokens") or self.completion_tokens
+        return prompt + completion
+
+    async def acquire(self, model: str, tokens: int, priority: int) -> bool:
+        """
+        Wait for the model's budget and a concurrency slot.
+
+        Returns:
+            False if the call could not be admitted within max_queue_seconds
+        """
+        start = time.monotonic()
+        deadline = start + self.max_queue_seconds
+        budget = self.budget(model)
+
+        while True:
+            wait = budget.wait_time(tokens)
+            if wait <= 0:
+                break
+            if time.monotonic() + wait > deadline:
+                self.rejected += 1
+                return False
+            # Jitter keeps callers that waited together from waking together
+            await asyncio.sleep(wait + random.uniform(0, 0.05))
+        budget.requests.take(1)
+        budget.tokens.take(tokens)
+
+        if self.active >= int(self.concurrency_limit) or self._waiters:
+            future = asyncio.get_running_loop().create_future()
+            entry = (priority, next(self._sequence), future)
+            heapq.heappush(self._waiters, entry)
+            self._wake()
+            try:
+                await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - time.monotonic()))
+            except BaseException as e:
+                if future.done() and not future.cancelled():
+                    # The slot was handed over just as the wait ended, give it back
+                    self.release()
+                else:
+                    # Leave the queue so the entry neither counts as queued nor holds up new arrivals
+                    future.cancel()
+                    self._withdraw(entry)
+                # The call is never sent, its budget goes back to the model
+                budget.requests.refund(1)
+                budget.tokens.refund(tokens)
+                if not isinstance(e, asyncio.TimeoutError):
+                    raise
+                self.rejected += 1
+                return False
+        else:
+            self.active += 1
+
+        self.calls += 1
+        metrics.observe("llm_queue_wait_seconds", time.monotonic() - start, model=model, priority=priority)
+        return True
+
+    def release(self):
+        """Free a concurrency slot and hand it to the highest priority waiter"""
+        self.active -= 1
+        self._wake()
+
+    def _withdraw(self, entry: tuple):
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            return
+        heapq.heapify(self._waiters)
+
+    def _wake(self):
+        while self._waiters and self.active < int(self.concurrency_limit):
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    def on_response(self, model: str, headers: httpx.Headers):
+        """Sync the token budget with the rate-limit headers and adapt concurrency"""
+        budget = self.budget(model)
+        limit_tokens = _number(headers.get("x-ratelimit-limit-tokens"))
+        remaining_tokens = _number(headers.get("x-ratelimit-remaining-tokens"))
+        budget.tokens.sync(
+            limit_tokens * self.share if limit_tokens else None,
+            remaining_tokens * self.share if remaining_tokens is not None else None
+        )
+
+        # Groq reports requests per day: a depleted daily quota blocks the model until it resets
+        if _number(headers.get("x-ratelimit-remaining-requests")) == 0:
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                budget.blocked_until = max(budget.blocked_until, time.monotonic() + reset)
+
+        # Additive increase while more than 10% of the token budget is left
+        if remaining_tokens is None or not limit_tokens or remaining_tokens > 0.1 * limit_tokens:
+            self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+            self._wake()
+
+    def on_rate_limited(self, model: str, headers: httpx.Headers, attempt: int) -> float:
+        """
+        Record a 429: halve concurrency and block the model until the server says to retry.
+
+        Returns:
+            Seconds to wait before retrying
+        """
+        self.rate_limited += 1
+        metrics.increment("llm_rate_limited_total", model=model)
+        self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+
+        # Full jitter exponential backoff, never shorter than the server's retry-after
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = parse_duration(headers.get("retry-after")) or parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0
+        delay = max(backoff, retry_after)
+
+        budget = self.budget(model)
+        budget.blocked_until = max(budget.blocked_until, time.monotonic() + delay)
+        return delay
+
+    def stats(self) -> dict:
+        """Concurrency and rate-limit counters"""
+        return {
+            "concurrency_limit": round(self.concurrency_limit, 2),
+            "active": self.active,
+            "queued": len(self._waiters),
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "rejected": self.rejected,
+            "token_budgets": {model: round(budget.tokens.available) for model, budget in self._budgets.items()}
+        }
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that frees the scheduler slot once it is closed (streamed completions hold it until then)"""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport routing chat completion calls through an LLMScheduler.
+
+    Every chain reaches Groq through the shared async client, so scheduling at
+    the transport sees each call and the rate-limit headers of its response.
+    Other requests (e.g. the warm-up model listing) pass straight through.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, scheduler: LLMScheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        priority = int(request.headers.get(PRIORITY_HEADER, PRIORITY_REASONING))
+        if PRIORITY_HEADER in request.headers:
+            del request.headers[PRIORITY_HEADER]
+
+        if not request.url.path.endswith("/chat/completions"):
+            return await self.transport.handle_async_request(request)
+
+        try:
+            body = json.loads(request.content)
+        except ValueError:
+            body = {}
+        model = body.get("model", "unknown")
+        tokens = self.scheduler.estimate_tokens(body)
+
+        attempt = 0
+        while True:
+            if not await self.scheduler.acquire(model, tokens, priority):
+                return httpx.Response(
+                    429,
+                    headers={"retry-after": str(int(self.scheduler.max_queue_seconds))},
+                    json={"error": {"message": f"Rate limit budget for {model} exhausted locally", "type": "rate_limit"}},
+                    request=request
+                )
+
+            try:
+                response = await self.transport.handle_async_request(request)
+            except BaseException:
+                self.scheduler.release()
+                raise
+
+            if response.status_code == 429 and attempt < self.scheduler.max_retries:
+                await response.aclose()
+                self.scheduler.release()
+                # The model is blocked for the backoff delay, the next acquire waits it out
+                self.scheduler.on_rate_limited(model, response.headers, attempt)
+                attempt += 1
+                continue
+
+            if response.status_code == 429:
+                self.scheduler.on_rate_limited(model, response.headers, attempt)
+            else:
+                self.scheduler.on_response(model, response.headers)
+            response.stream = _ReleasingStream(response.stream, self.scheduler.release)
+            return response
+
+    async def aclose(self):
+        await self.transport.aclose()